@@ -19,16 +19,28 @@ import json
 import csv
 import os
 import re
+import signal
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
 import mysql.connector
+import mysql.connector.pooling
+import paramiko
 import random
 
 class MySQLDriver:
     # Class-level constants (regexes) if desired
-    TPCC_PATTERN = re.compile(r"trx:\s*(\d+)")
-    SYSBENCH_PATTERN = re.compile(r"tps:\s+([\d.]+)")
-    SYSBENCH_LATENCY_PATTERN = re.compile(r"lat \(ms,95%\):\s+([\d.]+)")
+    # Log patterns match raw log bytes with ASCII-only classes, no Unicode decoding needed
+    TPCC_PATTERN = re.compile(rb"trx:\s*(\d+)", re.ASCII)
+    # tps and 95th-percentile latency are extracted in a single pass over the raw log bytes
+    SYSBENCH_PATTERN = re.compile(rb"tps:\s+([\d.]+)|lat \(ms,95%\):\s+([\d.]+)", re.ASCII)
+    VIEW_PATTERN = re.compile(r"\bview\b", re.IGNORECASE)
+    # A whole CREATE VIEW ... DROP VIEW sequence, run by execute_olap as one unit
+    VIEW_RE = re.compile(r"create\s+view.*?drop\s+view[^;]*;", re.IGNORECASE | re.DOTALL)
+    # Only the last 30 one-second report lines are parsed, they fit easily in this tail
+    LOG_TAIL_BYTES = 64 * 1024
     def __init__(self,
                  remote: dict,
                  ssh_key_path: str = "~/.ssh/key",
@@ -39,7 +51,8 @@ class MySQLDriver:
                  is_limited_cpu: int = 0,
                  objective_metric: str = "trx", 
                  budget_allocator: int = 0,
-                 tpcc_mysql_path: str = "/home/cloud/tpcc-mysql"
+                 tpcc_mysql_path: str = "/home/cloud/tpcc-mysql",
+                 olap_workers: int = 1
                  ):
         """
         Initialize the MySQLDriver with SSH and DB connection details.
@@ -54,6 +67,7 @@ class MySQLDriver:
         :param ssh_key_path: Path to the SSH private key.
         :param local_log_dir: Local directory path for logs.
         :param remote_mycnf_path: Remote path where the .cnf override will be placed.
+        :param olap_workers: Number of OLAP queries executed concurrently (1 = sequential).
         """
         self.remote = remote
         self.ssh_key_path = ssh_key_path
@@ -65,7 +79,48 @@ class MySQLDriver:
         self.local_res_log_dir = local_res_log_dir
         self.budget_allocator = budget_allocator
         self.best_performance = 0
+        # True when the last execute_oltp/execute_olap result is a complete measurement,
+        # False for estimates (sampled OLAP, aborted OLTP) and failed runs
+        self.last_result_final = False
         self.tpcc_mysql_path = tpcc_mysql_path
+        # one pooled connection per worker, and mysql-connector caps pools at CNX_POOL_MAXSIZE (32)
+        max_workers = mysql.connector.pooling.CNX_POOL_MAXSIZE
+        if olap_workers > max_workers:
+            print(f"Warning: olap_workers={olap_workers} exceeds the MySQL pool limit, using {max_workers}.")
+        self.olap_workers = min(max(1, olap_workers), max_workers)
+        # Persistent SSH session shared by every _ssh_command call, opened on first use
+        self._ssh = None
+        # MySQL connection pool for execute_olap, built on first use; the lock keeps
+        # concurrent OLAP workers from each building their own
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Parsed OLAP query lists, keyed by (sql file path, mtime)
+        self._olap_query_cache = {}
+        self._olap_multi_queries = set()
+        # Invariant parts of the OLTP benchmark commands and log paths
+        self._sysbench_base = [
+            "sudo",
+            "nice",
+            "-n",
+            "-10",
+            "sysbench",
+            "--db-driver=mysql",
+            f"--mysql-host={self.remote['host']}",
+            "--mysql-user=dbbert",
+            "--mysql-password=dbbert",
+            "--mysql-db=sysbench4",
+            "--tables=10",
+            "--table-size=2000000",
+            "--report-interval=1",
+            "--threads=50",
+        ]
+        self._tpcc_base = (
+            f"sudo nice -n -10 "
+            f"{self.tpcc_mysql_path}/tpcc_start "
+            f"-h{self.remote['host']} -P3306 -dtpcc100 -udbbert -pdbbert "
+            f"-w100 -c32 -r10"
+        )
+        self._log_prefixes = {}
         # Make sure the local log directory exists
         os.makedirs(self.local_log_dir, exist_ok=True)
 
@@ -75,26 +130,76 @@ class MySQLDriver:
         """
         return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-    def _ssh_command(self, cmd: str):
+    def _get_ssh_client(self) -> paramiko.SSHClient:
         """
-        Runs a shell command on the remote machine via SSH.
-        Returns (stdout, stderr, returncode).
+        Return the persistent SSH client, (re)connecting if needed. Key exchange and
+        authentication happen once; each command then only opens a channel.
+        Connected lazily, so that debug runs never touch the network.
         """
-        ssh_cmd = [
-            "ssh",
-            "-i", self.ssh_key_path,
-            f"{self.remote['remote_user']}@{self.remote['host']}",
-            cmd
-        ]
-        proc = subprocess.Popen(ssh_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        out, err = proc.communicate()
-        return out, err, proc.returncode
+        transport = self._ssh.get_transport() if self._ssh is not None else None
+        if transport is None or not transport.is_active():
+            self._ssh = paramiko.SSHClient()
+            self._ssh.load_system_host_keys()
+            self._ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            self._ssh.connect(
+                hostname=self.remote['host'],
+                username=self.remote['remote_user'],
+                key_filename=os.path.expanduser(self.ssh_key_path)
+            )
+        return self._ssh
+
+    def _ssh_command(self, cmd: str, input_data: str = None):
+        """
+        Runs a shell command on the remote machine over the persistent SSH session.
+        `input_data`, if given, is fed to the remote command's stdin.
+        The command runs in the C locale, so tool output is plain ASCII with '.' decimals.
+        Returns (stdout, stderr, returncode) with stdout/stderr as undecoded bytes;
+        callers that need text decode it themselves.
+        """
+        try:
+            stdin, stdout, stderr = self._get_ssh_client().exec_command(f"export LANG=C LC_ALL=C; {cmd}")
+        except (paramiko.SSHException, OSError) as e:
+            return b"", str(e).encode(), 255
+        if input_data is not None:
+            stdin.write(input_data)
+        stdin.channel.shutdown_write()
+        # stdout and stderr share one channel window that only widens as data is read:
+        # drain stderr on a helper thread, or a command writing a lot of it blocks both ends
+        err_chunks = []
+        err_reader = threading.Thread(target=lambda: err_chunks.append(stderr.read()), daemon=True)
+        err_reader.start()
+        out = stdout.read()
+        err_reader.join()
+        return out, b"".join(err_chunks), stdout.channel.recv_exit_status()
+
+    def close(self):
+        """
+        Close the persistent SSH session, if one was opened.
+        """
+        if self._ssh is not None:
+            self._ssh.close()
+            self._ssh = None
+
+    def _upload_files(self, files: dict):
+        """
+        Upload {remote_path: content} byte-for-byte over SFTP on the persistent SSH session,
+        so file contents never go through the remote shell.
+        """
+        sftp = self._get_ssh_client().open_sftp()
+        try:
+            for path, content in files.items():
+                with sftp.file(path, "w") as f:
+                    f.write(content)
+        finally:
+            sftp.close()
 
     def apply_config_and_restart(self, config_dict: dict) -> bool:
         """
         Apply a JSON-formatted config dict to the remote MySQL instance and restart MySQL,
         optionally setting a memory limit (via systemd slice) if self.is_fixed_ram != 0,
         and optionally setting CPUQuota if self.is_limited_cpu != 0.
+        Files are uploaded to /tmp over SFTP, then all remote steps are sent
+        as one script over the same SSH session.
         """
         print(f"{self.now_str()} [{self.remote['host']}] Applying config")
 
@@ -110,20 +215,17 @@ class MySQLDriver:
             remote_config_content += f"{knob} = {val}\n"
 
         temp_cfg_path = "/tmp/my_override.cnf"
-        safe_content = remote_config_content.replace("'", "'\\''")
+        uploads = {}
 
-        # 2) Write that config to remote /tmp, then move into place
-        echo_cmd = f"echo '{safe_content}' > {temp_cfg_path}"
-        _, err, code = self._ssh_command(echo_cmd)
-        if code != 0:
-            print(f"{self.now_str()} [{self.remote['host']}] Failed to write temp config: {err}")
-            return False
+        # Abort on the first failing step and report which one it was
+        steps = [
+            "set -e",
+            "trap 'echo \"failed step: $BASH_COMMAND\" >&2' ERR",
+        ]
 
-        move_cmd = f"sudo mv {temp_cfg_path} {self.remote_mycnf_path}"
-        _, err, code = self._ssh_command(move_cmd)
-        if code != 0:
-            print(f"{self.now_str()} [{self.remote['host']}] Failed to move config to {self.remote_mycnf_path}: {err}")
-            return False
+        # 2) Write that config to remote /tmp, then move into place
+        uploads[temp_cfg_path] = remote_config_content
+        steps.append(f"sudo mv {temp_cfg_path} {self.remote_mycnf_path}")
 
         # ----------------------------------------------------------------------
         # MEMORY LIMIT STEPS
@@ -137,55 +239,25 @@ class MySQLDriver:
                 "[Slice]\n"
                 f"MemoryMax={self.is_fixed_ram}M\n"
             )
-            temp_slice_path = "/tmp/mysql-limit.slice"
-            safe_slice = memory_slice_content.replace("'", "'\\''")
-            echo_slice_cmd = f"echo '{safe_slice}' > {temp_slice_path}"
-            _, err, code = self._ssh_command(echo_slice_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to write temp slice file: {err}")
-                return False
-
-            move_slice_cmd = "sudo mv /tmp/mysql-limit.slice /etc/systemd/system/mysql-limit.slice"
-            _, err, code = self._ssh_command(move_slice_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to move slice file: {err}")
-                return False
+            uploads["/tmp/mysql-limit.slice"] = memory_slice_content
+            steps.append("sudo mv /tmp/mysql-limit.slice /etc/systemd/system/mysql-limit.slice")
 
             # 2) Modify MySQL service to run under "mysql-limit.slice"
             #    We'll do this via a drop-in override file, similar to how you handle CPU.
             #    For example: /etc/systemd/system/mysql.service.d/override_memory.conf
             mem_override_content = "[Service]\nSlice=mysql-limit.slice\n"
-            mem_override_temp = "/tmp/override_memory.conf"
-            safe_mem_override = mem_override_content.replace("'", "'\\''")
-            echo_mem_override_cmd = f"echo '{safe_mem_override}' > {mem_override_temp}"
-            _, err, code = self._ssh_command(echo_mem_override_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to write temp memory override: {err}")
-                return False
-
-            mkdir_cmd = "sudo mkdir -p /etc/systemd/system/mysql.service.d/"
-            _, err, code = self._ssh_command(mkdir_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to create systemd override dir: {err}")
-                return False
-
-            move_mem_override_cmd = (
+            uploads["/tmp/override_memory.conf"] = mem_override_content
+            steps.append("sudo mkdir -p /etc/systemd/system/mysql.service.d/")
+            steps.append(
                 "sudo mv /tmp/override_memory.conf "
                 "/etc/systemd/system/mysql.service.d/override_memory.conf"
             )
-            _, err, code = self._ssh_command(move_mem_override_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to install memory override: {err}")
-                return False
 
         else:
             # If we do NOT want a memory limit, remove the slice & override if present
-            check_remove_slice = "sudo rm -f /etc/systemd/system/mysql-limit.slice"
-            self._ssh_command(check_remove_slice)
-            check_remove_mem_override = (
-                "sudo rm -f /etc/systemd/system/mysql.service.d/override_memory.conf"
-            )
-            self._ssh_command(check_remove_mem_override)
+            # (best effort, a failure here is not fatal)
+            steps.append("sudo rm -f /etc/systemd/system/mysql-limit.slice || true")
+            steps.append("sudo rm -f /etc/systemd/system/mysql.service.d/override_memory.conf || true")
 
         # ----------------------------------------------------------------------
         # CPU LIMIT STEPS (your existing code for CPUAffinity or CPUQuota)
@@ -194,74 +266,187 @@ class MySQLDriver:
             print("Setting CPUQuota")
             override_content = f"[Service]\nCPUQuota={self.is_limited_cpu}%\n"
             temp_override_path = "/tmp/mysql_override.conf"
-            safe_override = override_content.replace("'", "'\\''")
-            echo_override_cmd = f"echo '{safe_override}' > {temp_override_path}"
-            _, err, code = self._ssh_command(echo_override_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to write temp override config: {err}")
-                return False
-
-            mkdir_cmd = "sudo mkdir -p /etc/systemd/system/mysql.service.d/"
-            _, err, code = self._ssh_command(mkdir_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to create override directory: {err}")
-                return False
-
-            move_override_cmd = (
-                f"sudo mv {temp_override_path} /etc/systemd/system/mysql.service.d/override.conf"
-            )
-            _, err, code = self._ssh_command(move_override_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to move override config: {err}")
-                return False
-
-            _, err, code = self._ssh_command("sudo systemctl daemon-reload")
-            print("reload systemd daemon for CPUQuota")
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to reload systemd daemon: {err}")
-                return False
+            uploads[temp_override_path] = override_content
+            steps.append("sudo mkdir -p /etc/systemd/system/mysql.service.d/")
+            steps.append(f"sudo mv {temp_override_path} /etc/systemd/system/mysql.service.d/override.conf")
         else:
             # Remove CPU override if no CPU limit wanted
-            check_remove_cmd = (
+            steps.append(
                 "if [ -f /etc/systemd/system/mysql.service.d/override.conf ]; then "
                 "sudo rm -f /etc/systemd/system/mysql.service.d/override.conf; fi"
             )
-            _, err, code = self._ssh_command(check_remove_cmd)
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to remove override config: {err}")
-                return False
-
-            _, err, code = self._ssh_command("sudo systemctl daemon-reload")
-            if code != 0:
-                print(f"{self.now_str()} [{self.remote['host']}] Failed to reload systemd daemon: {err}")
-                return False
 
         # ----------------------------------------------------------------------
         # 3) Reload systemd & restart MySQL
         # ----------------------------------------------------------------------
-        # If we created or removed the slice, let's ensure systemd sees changes
-        _, err, code = self._ssh_command("sudo systemctl daemon-reload")
-        if code != 0:
-            print(f"{self.now_str()} [{self.remote['host']}] Failed to reload systemd daemon: {err}")
+        # A single reload picks up every slice/override change made above
+        steps.append("sudo systemctl daemon-reload")
+        steps.append("sudo systemctl restart mysql")
+
+        try:
+            self._upload_files(uploads)
+        except (paramiko.SSHException, OSError) as e:
+            print(f"{self.now_str()} [{self.remote['host']}] Failed to upload config files: {e}")
             return False
 
-        _, err, code = self._ssh_command("sudo systemctl restart mysql")
+        script = "\n".join(steps) + "\n"
+        _, err, code = self._ssh_command("bash -s", input_data=script)
         if code != 0:
-            print(f"{self.now_str()} [{self.remote['host']}] MySQL restart failed => {err}")
+            print(f"{self.now_str()} [{self.remote['host']}] Applying config / MySQL restart failed => {err.decode(errors='replace')}")
             return False
 
         print(f"{self.now_str()} [{self.remote['host']}] MySQL restart success")
         return True
 
-    def _execute_single_query(self, cursor, query: str) -> float:
+    def _execute_single_query(self, cursor, query: str, multi: bool = False) -> int:
         """
-        Execute a single SQL statement and return its execution time in seconds.
+        Execute an SQL query and return its execution time in nanoseconds
+        (monotonic clock; callers convert to seconds once, after summing).
+        Only multi-statement queries need their result sets drained with nextset();
+        a single statement just has its rows, if any, fetched.
         """
-        start = time.time()
+        start = time.perf_counter_ns()
         cursor.execute(query)
-        while cursor.nextset():
-            pass
-        return round(time.time() - start, 4)
+        if multi:
+            while cursor.nextset():
+                pass
+        elif cursor.with_rows:
+            cursor.fetchall()
+        return time.perf_counter_ns() - start
+
+    def _get_olap_connection(self):
+        """
+        Return a connection from the driver's MySQL pool, creating the pool on first use
+        so that every trial reuses already-authenticated connections.
+        Safe to call from several OLAP worker threads at once.
+        """
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = self._build_olap_pool()
+        return self._pool.get_connection()
+
+    def _build_olap_pool(self):
+        db_cfg = {
+            'host': self.remote['host'],
+            'user': self.remote['db_user'],
+            'password': self.remote['password'],
+            'database': self.remote['database'],
+            'port': self.remote.get('port', 3306),
+            # prefer the C extension when it is installed
+            'use_pure': not mysql.connector.HAVE_CEXT
+        }
+        return mysql.connector.pooling.MySQLConnectionPool(
+            pool_name="dot",
+            pool_size=max(4, self.olap_workers),  # olap_workers is at most CNX_POOL_MAXSIZE
+            pool_reset_session=False,
+            **db_cfg
+        )
+
+    def _run_query_batch(self, queries: list, multi: bool = None) -> dict:
+        """
+        Execute `queries` in order on one pooled connection.
+        `multi` forces multi-statement handling; by default only grouped view queries get it.
+        Returns {query: execution time in nanoseconds}.
+        """
+        conn = self._get_olap_connection()
+        # Result rows are discarded, so skip converting them to Python types
+        cursor = conn.cursor(raw=True)
+        try:
+            return {
+                q: self._execute_single_query(
+                    cursor, q, q in self._olap_multi_queries if multi is None else multi
+                )
+                for q in queries
+            }
+        finally:
+            cursor.close(); conn.close()
+
+    def _run_olap_queries(self, queries: list) -> dict:
+        """
+        Execute `queries` and return {query: execution time in nanoseconds}.
+        With olap_workers > 1, independent queries run concurrently, one pooled connection
+        per worker; statements touching views stay in file order on a single worker.
+        """
+        if self.olap_workers <= 1:
+            return self._run_query_batch(queries)
+
+        view_queries = [q for q in queries if self.VIEW_PATTERN.search(q)]
+        batches = [[q] for q in queries if not self.VIEW_PATTERN.search(q)]
+        if view_queries:
+            batches.insert(0, view_queries)
+
+        times = {}
+        with ThreadPoolExecutor(max_workers=self.olap_workers) as executor:
+            for batch_times in executor.map(self._run_query_batch, batches):
+                times.update(batch_times)
+        return times
+
+    @staticmethod
+    def _iter_sql_statements(f):
+        """
+        Yield the stripped statements of SQL text, given as an iterable of lines,
+        one at a time, splitting on ';' outside quoted literals.
+        """
+        buffer = []
+        quote = None
+        for line in f:
+            if quote is None and line.lstrip().startswith('--'):
+                buffer.append(line)
+                continue
+            for ch in line:
+                if quote is not None:
+                    if ch == quote:
+                        quote = None
+                elif ch in ("'", '"', '`'):
+                    quote = ch
+                elif ch == ';':
+                    statement = ''.join(buffer).strip()
+                    if statement:
+                        yield statement
+                    buffer = []
+                    continue
+                buffer.append(ch)
+        statement = ''.join(buffer).strip()
+        if statement:
+            yield statement
+
+    def _load_olap_queries(self, sql_file_path: str) -> list:
+        """
+        Split an SQL file into the queries run by execute_olap, grouping any
+        CREATE VIEW ... DROP VIEW sequence into a single unit.
+        The result is cached until the file is modified.
+        """
+        key = (sql_file_path, os.path.getmtime(sql_file_path))
+        if key in self._olap_query_cache:
+            queries, multi_queries = self._olap_query_cache[key]
+            self._olap_multi_queries = multi_queries
+            return queries
+
+        with open(sql_file_path, 'r') as f:
+            sql_text = f.read()
+
+        queries = []
+        # grouped view sequences are the only multi-statement queries
+        multi_queries = set()
+        # One pass: view sequences are located by VIEW_RE, the gaps between them
+        # are split into individual statements
+        pos = 0
+        for match in self.VIEW_RE.finditer(sql_text):
+            queries.extend(
+                part + ';'
+                for part in self._iter_sql_statements(sql_text[pos:match.start()].splitlines(True))
+            )
+            queries.append('; '.join(self._iter_sql_statements(match.group().splitlines(True))) + ';')
+            multi_queries.add(queries[-1])
+            pos = match.end()
+        queries.extend(
+            part + ';' for part in self._iter_sql_statements(sql_text[pos:].splitlines(True))
+        )
+
+        self._olap_query_cache[key] = (queries, multi_queries)
+        self._olap_multi_queries = multi_queries
+        return queries
 
     def execute_olap(self, sql_file_path: str, intermediate_csv=None) -> float:
         """
@@ -269,49 +454,29 @@ class MySQLDriver:
         Treat any CREATE VIEW ... DROP VIEW sequence as one unit when sampling.
         Estimate vs. baseline, log true times, and update baseline only on better full runs.
         """
-        # Load and group statements
-        with open(sql_file_path, 'r') as f:
-            parts = [p.strip() for p in f.read().split(';') if p.strip()]
-        queries = []
-        buffer = []
-        in_view = False
-        for part in parts:
-            low = part.lower()
-            if low.startswith('create view'):
-                in_view = True; buffer = [part]
-            elif in_view:
-                buffer.append(part)
-                if low.startswith('drop view'):
-                    queries.append('; '.join(buffer) + ';')
-                    buffer = []; in_view = False
-            else:
-                queries.append(part + ';')
+        self.last_result_final = False
+        queries = self._load_olap_queries(sql_file_path)
         if not queries:
             return 0.0
 
         # Initialize baselines
         if not hasattr(self, 'best_total_time'):
             self.best_total_time = None; self.best_olap_times = {}
+        # Per-query baseline times, parallel to `queries`, and their running total
+        if len(getattr(self, '_best_olap_by_idx', ())) != len(queries):
+            self._best_olap_by_idx = [0] * len(queries); self._best_olap_total = 0
         pct = max(0, min(100, getattr(self, 'budget_allocator', 100)))
-
-        # DB connection
-        db_cfg = {
-            'host': self.remote['host'],
-            'user': self.remote['db_user'],
-            'password': self.remote['password'],
-            'database': self.remote['database'],
-            'port': self.remote.get('port', 3306)
-        }
-        conn = mysql.connector.connect(**db_cfg)
-        cursor = conn.cursor()
+        sampling = 0 < pct < 100
 
         sample_total = 0.0; sample_csv = None
         # Sampling
-        if 0 < pct < 100:
+        if sampling:
             count = max(1, int(len(queries) * pct / 100))
-            sampled = random.sample(queries, count)
-            sample_times = {q: self._execute_single_query(cursor, q) for q in sampled}
-            sample_total = round(sum(sample_times.values()), 2)
+            sampled_indices = random.sample(range(len(queries)), count)
+            sampled = [queries[i] for i in sampled_indices]
+            sample_times = self._run_olap_queries(sampled)
+            sample_ns = sum(sample_times.values())
+            sample_total = round(sample_ns / 1e9, 2)
             # log sample
             if intermediate_csv:
                 base, ext = os.path.splitext(intermediate_csv)
@@ -324,23 +489,34 @@ class MySQLDriver:
                     w.writerow(['sample', sample_total])
                 print(f"Logged sample {sample_total}s -> {sample_csv}")
             # estimate full
-            total_best = sum(self.best_olap_times.get(q,0) for q in queries)
-            sampled_best = sum(self.best_olap_times.get(q,0) for q in sampled)
-            ratio = sample_total / sampled_best if sampled_best else 1
-            est = round(total_best * ratio, 2)
+            total_best = self._best_olap_total
+            sampled_best = sum(self._best_olap_by_idx[i] for i in sampled_indices)
+            ratio = sample_ns / sampled_best if sampled_best else 1
+            if self.olap_workers > 1 and total_best:
+                # concurrent queries overlap, so scale the wall-clock baseline instead
+                est = round(self.best_total_time * ratio, 2)
+            else:
+                est = round(total_best * ratio / 1e9, 2)
             if self.best_total_time is not None and est >= self.best_total_time:
-                cursor.close(); conn.close(); return est
+                return est
 
         # Full execution
-        start = time.time(); full_times = {}
-        for q in queries:
-            full_times[q] = self._execute_single_query(cursor, q)
-        full_total = round(time.time() - start, 2)
+        start = time.perf_counter_ns()
+        if sampling or self.olap_workers > 1:
+            full_times = self._run_olap_queries(queries)
+        else:
+            # Per-query times only feed the sampling estimator: without sampling,
+            # send the whole script as one multi-statement round-trip
+            full_times = {}
+            self._run_query_batch([" ".join(queries)], multi=True)
+        full_total = round((time.perf_counter_ns() - start) / 1e9, 2)
         print(f"Full run time: {full_total}s")
 
         # Update baseline and log combined if improved
         if self.best_total_time is None or full_total < self.best_total_time:
             self.best_total_time = full_total; self.best_olap_times = full_times.copy()
+            self._best_olap_by_idx = [full_times.get(q, 0) for q in queries]
+            self._best_olap_total = sum(self._best_olap_by_idx)
             print(f"New baseline: {full_total}s")
             if sample_csv:
                 combined = round(sample_total + full_total, 2)
@@ -350,7 +526,7 @@ class MySQLDriver:
         else:
             print(f"Baseline {self.best_total_time}s remains best")
 
-        cursor.close(); conn.close()
+        self.last_result_final = True
         return full_total
 
 
@@ -403,56 +579,80 @@ class MySQLDriver:
     #     # total_time = round(time.time() - start_time, 2)
     #     print(f"{self.now_str()} [{self.remote['host']}] TPC-H total time: {total_time} seconds")
     #     return total_time
-    def _parse_sysbench_log_for_latency(self, log_text: str) -> float:
+    def _read_log_tail(self, fd: int) -> bytes:
+        """
+        Read the last LOG_TAIL_BYTES of a benchmark log instead of the whole file,
+        straight from the descriptor the benchmark wrote to.
+        """
+        size = os.fstat(fd).st_size
+        offset = max(0, size - self.LOG_TAIL_BYTES)
+        tail = os.pread(fd, size - offset, offset)
+        if offset:
+            # Drop the first, most likely truncated, line
+            tail = tail[tail.find(b"\n") + 1:]
+        return tail
+
+    def _scan_sysbench_log(self, log_bytes: bytes):
+        """
+        Walk the sysbench log once and keep the last 30 tps and latency samples.
+        Returns (tps_values, latency_values).
+        """
+        tps_values = deque(maxlen=30)
+        latency_values = deque(maxlen=30)
+        for match in self.SYSBENCH_PATTERN.finditer(log_bytes):
+            tps, latency = match.groups()
+            if tps is not None:
+                tps_values.append(float(tps))
+            else:
+                latency_values.append(float(latency))
+        return tps_values, latency_values
+
+    def _parse_sysbench_log_for_latency(self, latency_values) -> float:
         """
-        Parse sysbench log text to compute average latency (95th percentile in ms)
-        from the last 30 lines.
+        Compute average latency (95th percentile in ms) from the last 30 samples.
         Returns None if <30 data points are found.
         Returns 95270 if all data points are zero.
         """
-        matches = self.SYSBENCH_LATENCY_PATTERN.findall(log_text)
-        if len(matches) < 30:
+        if len(latency_values) < 30:
             print(f"{self.now_str()}: Not enough latency data points (<30).")
             return None
 
-        last_30 = list(map(float, matches[-30:]))
-
+        values = np.fromiter(latency_values, dtype=np.float64, count=len(latency_values))
         # Remove all zeros
-        non_zero_values = [val for val in last_30 if val != 0.0]
+        non_zero_values = values[values != 0.0]
 
         # If all values were zero
-        if not non_zero_values:
+        if not non_zero_values.size:
             return 95270
 
-        avg_latency = sum(non_zero_values) / len(non_zero_values)
-        return round(avg_latency, 2)
+        return round(float(non_zero_values.mean()), 2)
 
 
-    def _parse_sysbench_log_for_tps(self, log_text: str) :
-        matches = self.SYSBENCH_PATTERN.findall(log_text)
-        if not matches:
+    def _parse_sysbench_log_for_tps(self, tps_values) :
+        """
+        Average the last (up to) 30 tps samples.
+        Returns None if no data found.
+        """
+        if not tps_values:
             print(f"{self.now_str()}: No TPS data found in the log.")
             return None
 
-        tps_values = list(map(float, matches))
-        values_to_average = tps_values[-30:] if len(tps_values) >= 30 else tps_values
-        avg_tps = sum(values_to_average) / len(values_to_average)
-        return round(avg_tps, 2)
+        values = np.fromiter(tps_values, dtype=np.float64, count=len(tps_values))
+        return round(float(values.mean()), 2)
 
-    def _parse_tpcc_log_for_trx(self, log_text: str) :
+    def _parse_tpcc_log_for_trx(self, log_bytes: bytes) :
         """
-        Parse TPC-C log text to average the "trx:" value from the last 30 occurrences.
+        Parse TPC-C log bytes to average the "trx:" value from the last 30 occurrences.
         Returns None if no data found.
         """        
-        matches = self.TPCC_PATTERN.findall(log_text)
+        matches = self.TPCC_PATTERN.findall(log_bytes)
         if not matches:
             print(f"{self.now_str()}: No 'trx:' data found in the log.")
             return None
 
-        trx_values = list(map(int, matches))
-        values_to_average = trx_values[-30:] if len(trx_values) >= 30 else trx_values
-        avg_trx = sum(values_to_average) / len(values_to_average)
-        return round(avg_trx, 2)
+        last_matches = matches[-30:]
+        trx_values = np.fromiter(map(int, last_matches), dtype=np.int64, count=len(last_matches))
+        return round(float(trx_values.mean()), 2)
 
    
     def _parse_resource_log_for_averages(self,csv_file_path: str, num_samples: int = 30):
@@ -519,87 +719,109 @@ class MySQLDriver:
 
 
     def execute_oltp(self, benchmark: str = "sysbench") -> tuple[float, float, float, float]:
-        """Run one (or possibly two) OLTP benchmarks and return
-        (perf_metric, mean_cpu, mean_ram, mean_io)."""
+        """Run one OLTP benchmark and return (perf_metric, mean_cpu, mean_ram, mean_io).
+        With a budget_allocator below 90 s, the benchmark is started for the full 90 s and
+        aborted once the budget has elapsed unless its estimate so far beats best_performance."""
 
-        def _run_once(time_budget: int) -> tuple[float, float, float, float]:
-            oltp_cmd = self._build_oltp_command(benchmark, time_budget)
-            if oltp_cmd is None:
-                return -9527, 0.0, 0.0, 0.0                      # sentinel on bad benchmark name
+        # ---------- respect budget_allocator or default 90 ----------
+        self.last_result_final = False
+        time_budget = self.budget_allocator if getattr(self, "budget_allocator", 0) else 90
+        early_abort = time_budget < 90
+        run_time = 90 if early_abort else time_budget
 
-            log_path, res_path = self._prepare_log_paths(benchmark)
-            print(f"{self.now_str()}: [{self.remote['host']}] Running {benchmark} ({time_budget}s) -> {log_path}")
-            print(f"benchmark allocator on, benchmark executed for {time_budget} seconds")
+        oltp_cmd = self._build_oltp_command(benchmark, run_time)
+        if oltp_cmd is None:
+            return -9527, 0.0, 0.0, 0.0                      # sentinel on bad benchmark name
 
-            proc, lf, start_time = self._launch_benchmark(oltp_cmd, log_path)
-            # self._monitor_remote_metrics(proc, benchmark, res_path, start_time) # deactivate for now
+        log_path, res_path = self._prepare_log_paths(benchmark)
+        print(f"{self.now_str()}: [{self.remote['host']}] Running {benchmark} ({run_time}s) -> {log_path}")
+        print(f"benchmark allocator on, benchmark checked after {time_budget} seconds")
 
-            return self._parse_final_metrics(benchmark, log_path, res_path, proc, lf)
+        proc, lf, start_time = self._launch_benchmark(oltp_cmd, log_path)
+        # self._monitor_remote_metrics(proc, benchmark, res_path, start_time) # deactivate for now
 
-        # ---------- first run (respect budget_allocator or default 90) ----------
-        time_budget = self.budget_allocator if getattr(self, "budget_allocator", 0) else 90
-        perf, mean_cpu, mean_ram, mean_io = _run_once(time_budget)
-
-        # ---------- update / optional confirmation run ----------
-        if perf > getattr(self, "best_performance", float("-inf")):
-            # If the first run used a truncated time budget, do a confirming 90-second run
-            if self.budget_allocator and time_budget < 90:
-                print(f"{self.now_str()}: New best performance {perf:.2f}. Re-running for 90 s to confirm.")
-                perf2, mean_cpu2, mean_ram2, mean_io2 = _run_once(90)
-
-                if perf2 > self.best_performance:
-                    self.best_performance = perf2
-                    # perf, mean_cpu, mean_ram, mean_io = perf2, mean_cpu2, mean_ram2, mean_io2
-                return perf2, mean_cpu2, mean_ram2, mean_io2
+        aborted = early_abort and self._abort_if_not_competitive(benchmark, proc, lf, time_budget)
+        perf, mean_cpu, mean_ram, mean_io = self._parse_final_metrics(
+            benchmark, log_path, res_path, proc, lf, aborted=aborted
+        )
+        self.last_result_final = not aborted and proc.returncode == 0
+
+        # ---------- update best only after a confirmed full-length run ----------
+        if early_abort and not aborted and perf > self.best_performance:
+            self.best_performance = perf
         return perf, mean_cpu, mean_ram, mean_io
 
+    def workload_key(self, benchmark: str) -> str:
+        """
+        What a trial of `benchmark` measures besides the knob values: server, benchmark
+        command and driver settings that change the result. Results are comparable only
+        between trials with the same key.
+        """
+        if benchmark == "sysbench":
+            workload = " ".join(self._sysbench_base)
+        elif benchmark == "tpcc":
+            workload = self._tpcc_base
+        else:
+            workload = f"{self.remote['host']}:{self.remote.get('port')}/{self.remote.get('database')} workers={self.olap_workers}"
+        return (f"{benchmark}|{workload}|metric={self.objective_metric}"
+                f"|fixed_ram={self.is_fixed_ram}|limited_cpu={self.is_limited_cpu}")
+
+    def _abort_if_not_competitive(self, benchmark, proc, lf, time_budget) -> bool:
+        """
+        Wait `time_budget` seconds into a running benchmark, estimate its performance from
+        the log written so far and terminate it if the estimate does not beat best_performance.
+        Returns True if the benchmark was aborted.
+        """
+        try:
+            proc.wait(timeout=time_budget)
+            return False  # finished (or failed) before the budget elapsed
+        except subprocess.TimeoutExpired:
+            pass
+
+        estimate = self._metric_from_log(benchmark, self._read_log_tail(lf.fileno()))
+        if estimate > self.best_performance:
+            print(f"{self.now_str()}: New best performance {estimate:.2f}. Running to 90 s to confirm.")
+            return False
+
+        print(f"{self.now_str()}: Estimate {estimate:.2f} after {time_budget}s is not competitive, aborting run.")
+        # the whole process group: tpcc runs under /bin/sh, terminating only the shell
+        # would leave tpcc_start running into the next trial
+        os.killpg(proc.pid, signal.SIGTERM)
+        return True
+
 
 
     def _build_oltp_command(self, benchmark: str, time_budget: int):
+        # Only the duration changes between trials, the rest is precomputed in __init__
         if benchmark == "sysbench":
-            return [
-                "sudo",
-                "nice",
-                "-n",
-                "-10",
-                "sysbench",
-                "--db-driver=mysql",
-                f"--mysql-host={self.remote['host']}",
-                "--mysql-user=dbbert",
-                "--mysql-password=dbbert",
-                "--mysql-db=sysbench4",
-                "--tables=10",
-                "--table-size=2000000",
-                f"--time={time_budget}",
-                "--report-interval=1",
-                "--threads=50",
-                "oltp_read_write",
-                "run",
-            ]
+            return self._sysbench_base + [f"--time={time_budget}", "oltp_read_write", "run"]
         if benchmark == "tpcc":
-            return (
-                f"sudo nice -n -10 "
-                f"{self.tpcc_mysql_path}/tpcc_start "
-                f"-h{self.remote['host']} -P3306 -dtpcc100 -udbbert -pdbbert "
-                f"-w100 -c32 -r10 -l{time_budget} -i1"
-            )
+            return f"{self._tpcc_base} -l{time_budget} -i1"
         print("benchmark not implemented")
         return None
 
 
     def _prepare_log_paths(self, benchmark: str):
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_path = os.path.join(self.local_log_dir, f"{benchmark}_{self.remote['host']}_{ts}.log")
-        res_path = os.path.join(self.local_res_log_dir, f"{benchmark}_{self.remote['host']}_{ts}.csv")
-        return log_path, res_path
+        if benchmark not in self._log_prefixes:
+            prefix = f"{benchmark}_{self.remote['host']}_"
+            self._log_prefixes[benchmark] = (
+                os.path.join(self.local_log_dir, prefix),
+                os.path.join(self.local_res_log_dir, prefix),
+            )
+        log_prefix, res_prefix = self._log_prefixes[benchmark]
+        return f"{log_prefix}{ts}.log", f"{res_prefix}{ts}.csv"
 
 
     def _launch_benchmark(self, oltp_cmd, log_path):
-        lf = open(log_path, "w")
+        # Opened for reading too, so the log can be parsed before the handle is closed
+        lf = open(log_path, "w+b")
+        # own session, so an early abort can signal the benchmark and all its children at once
         if isinstance(oltp_cmd, list):
-            proc = subprocess.Popen(oltp_cmd, stdout=lf, stderr=lf, text=True)
+            proc = subprocess.Popen(oltp_cmd, stdout=lf, stderr=lf, text=True, start_new_session=True)
         else:
-            proc = subprocess.Popen(oltp_cmd, shell=True, stdout=lf, stderr=lf, text=True)
+            proc = subprocess.Popen(oltp_cmd, shell=True, stdout=lf, stderr=lf, text=True,
+                                    start_new_session=True)
         return proc, lf, time.time()
 
 
@@ -607,7 +829,7 @@ class MySQLDriver:
         top_out, _, rc = self._ssh_command("top -b -d 1 -n 2 | grep mysqld | tail -n 1")
         cpu = mem = 0.0
         if rc == 0 and top_out:
-            for ln in top_out.splitlines():
+            for ln in top_out.decode(errors="replace").splitlines():
                 if "mysqld" in ln and "COMMAND" not in ln:
                     p = ln.split()
                     if len(p) >= 10:
@@ -623,7 +845,7 @@ class MySQLDriver:
         io_out, _, rc = self._ssh_command("iostat -x -d vda 1 1")
         util = 0.0
         if rc == 0 and io_out:
-            for ln in io_out.splitlines():
+            for ln in io_out.decode(errors="replace").splitlines():
                 if ln.startswith("vda"):
                     try:
                         util = float(ln.split()[-1])
@@ -659,30 +881,39 @@ class MySQLDriver:
         pass # deactivate for now
 
 
-    def _parse_final_metrics(self, benchmark, log_path, res_path, proc, lf):
-        rc = proc.wait()
-        lf.close()
-        if rc == -9:
-            print("tpcc weird behavior, killed")
-        if rc != 0:
-            print(f"{self.now_str()}: [{self.remote['host']}] {benchmark} failed with code {rc}.")
-        with open(log_path) as f:
-            log_txt = f.read()
-        mean_cpu, mean_ram, mean_io = self._parse_resource_log_for_averages(res_path, 30)
+    def _metric_from_log(self, benchmark, log_bytes):
+        """
+        Compute the objective metric for `benchmark` from (the tail of) its log.
+        """
+        if benchmark == "sysbench":
+            tps_values, latency_values = self._scan_sysbench_log(log_bytes)
         if benchmark == "sysbench" and self.objective_metric == "trx":
-            v = self._parse_sysbench_log_for_tps(log_txt)
-            return (v if v is not None else 0, mean_cpu, mean_ram, mean_io)
+            v = self._parse_sysbench_log_for_tps(tps_values)
+            return v if v is not None else 0
         if benchmark == "sysbench" and self.objective_metric == "lat":
-            v = self._parse_sysbench_log_for_latency(log_txt)
-            return (-(v) if v is not None else -999999, mean_cpu, mean_ram, mean_io)
+            v = self._parse_sysbench_log_for_latency(latency_values)
+            return -(v) if v is not None else -999999
         if benchmark == "tpcc" and self.objective_metric == "trx":
-            v = self._parse_tpcc_log_for_trx(log_txt)
-            return (v if v is not None else 0, mean_cpu, mean_ram, mean_io)
+            v = self._parse_tpcc_log_for_trx(log_bytes)
+            return v if v is not None else 0
         if benchmark == "tpcc" and self.objective_metric == "lat":
             print("not yet implemented")
-            return (-9527, mean_cpu, mean_ram, mean_io)
+            return -9527
         print("something is wrong at execute_oltp in mysqldriver")
-        return (-9527, mean_cpu, mean_ram, mean_io)
+        return -9527
+
+    def _parse_final_metrics(self, benchmark, log_path, res_path, proc, lf, aborted=False):
+        rc = proc.wait()
+        try:
+            log_bytes = self._read_log_tail(lf.fileno())
+        finally:
+            lf.close()
+        if rc == -9:
+            print("tpcc weird behavior, killed")
+        if rc != 0 and not aborted:
+            print(f"{self.now_str()}: [{self.remote['host']}] {benchmark} failed with code {rc}.")
+        mean_cpu, mean_ram, mean_io = self._parse_resource_log_for_averages(res_path, 30)
+        return (self._metric_from_log(benchmark, log_bytes), mean_cpu, mean_ram, mean_io)
 
         
 
@@ -722,3 +953,5 @@ if __name__ == "__main__":
     # Or TPC-C
     tpcc_trx = driver.execute_oltp("tpcc")
     print("TPC-C TRX =>", tpcc_trx)
+
+    driver.close()
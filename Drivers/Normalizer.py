@@ -12,14 +12,95 @@
  */
 """
 
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from _normalizer_kernels import denorm as _denorm_kernel
+except ImportError:
+    _denorm_kernel = None
+
+# Knob kinds, compared as ints rather than as type strings
+KNOB_INTEGER = 0
+KNOB_BOOLEAN = 1
+KNOB_UNSUPPORTED = -1
+KNOB_KINDS = {"integer": KNOB_INTEGER, "boolean": KNOB_BOOLEAN}
+
+
+@dataclass(frozen=True, slots=True)
+class KnobSpec:
+    """
+    One knob_dict entry, parsed once.
+    Integer knobs keep their exact bounds in min/max; boolean knobs use min=0, max=1
+    and keep their tokens (e.g. "ON"/"OFF") in bool_min/bool_max.
+    """
+    kind: int
+    min: int
+    max: int
+    default: object
+    bool_min: object = None
+    bool_max: object = None
+
+    @classmethod
+    def from_entry(cls, entry: list) -> "KnobSpec":
+        """
+        Build a KnobSpec from a knob_dict value: [knob_type, [min, max, default]].
+        """
+        knob_type, (min_val, max_val, default_val) = entry
+        kind = KNOB_KINDS.get(knob_type, KNOB_UNSUPPORTED)
+        if kind == KNOB_BOOLEAN:
+            return cls(kind, 0, 1, default_val, min_val, max_val)
+        return cls(kind, min_val, max_val, default_val)
+
+
 class Normalizer:
     def __init__(self, knob_dict: dict):
         """
         Initializes the Normalizer with a dictionary defining each MySQL knob and its value range.
+        Raises NotImplementedError for unsupported knob types and ValueError for integer
+        knobs whose max_val equals min_val.
         """
         self.knob_dict = knob_dict
         # Store knobs in a stable order so the i-th normalized value corresponds to the i-th knob
         self.knob_names = list(knob_dict.keys())
+        # Same names as a set, for membership tests
+        self.knob_name_set = frozenset(self.knob_names)
+        # knob_dict entries parsed once, parallel to knob_names
+        self._specs = tuple(KnobSpec.from_entry(knob_dict[knob]) for knob in self.knob_names)
+
+        # Validate every knob once, here, so normalize/denormalize need no per-knob checks
+        for knob, spec in zip(self.knob_names, self._specs):
+            if spec.kind == KNOB_UNSUPPORTED:
+                raise NotImplementedError(f"Unsupported knob type: {knob_dict[knob][0]}")
+            if spec.kind == KNOB_INTEGER and spec.max == spec.min:
+                raise ValueError(f"For knob '{knob}', max_val equals min_val.")
+        # Indices of the boolean knobs; integer knobs are handled by the NumPy arrays below
+        self._bool_idx = tuple(i for i, spec in enumerate(self._specs) if spec.kind == KNOB_BOOLEAN)
+
+        # Structure-of-arrays view of the specs, so that a whole configuration is
+        # converted with a few NumPy operations instead of one Python step per knob
+        self._is_int = np.array([spec.kind == KNOB_INTEGER for spec in self._specs], dtype=bool)
+        # Integer bounds as float64; boolean slots get 0/1 so their values pass through unchanged
+        self._min = np.array([spec.min for spec in self._specs], dtype=np.float64)
+        self._max = np.array([spec.max for spec in self._specs], dtype=np.float64)
+        # Per-knob range and its reciprocal, so normalize multiplies instead of dividing
+        self._range = self._max - self._min
+        self._inv_range = 1.0 / self._range
+        # Integer knobs whose bounds are beyond float64's exact integer range (e.g. 2**64-1):
+        # for these, min + norm * range may round past the bounds and needs an exact clip
+        self._inexact_idx = tuple(
+            i for i, spec in enumerate(self._specs)
+            if spec.kind == KNOB_INTEGER and max(abs(spec.min), abs(spec.max)) > 2**53
+        )
+        # Normalized defaults, computed on the first get_default_normalized_values call
+        self._default_normalized = None
+        # Boolean knobs keep their (min, max) tokens, e.g. ("ON", "OFF"), for output; None for integers
+        self._bool_tokens = [
+            (spec.bool_min, spec.bool_max) if spec.kind == KNOB_BOOLEAN else None
+            for spec in self._specs
+        ]
 
     def denormalize(self, normalized_values: list) -> dict:
         """
@@ -30,79 +111,171 @@ class Normalizer:
                 f"Input list length {len(normalized_values)} does not match "
                 f"knob count {len(self.knob_names)}."
             )
+        return self.denormalize_batch([normalized_values])[0]
 
-        config_dict = {}
-        for i, knob in enumerate(self.knob_names):
-            knob_type, (min_val, max_val, default_val) = self.knob_dict[knob]
-            norm_val = normalized_values[i]
-
-            if knob_type == "integer":
-                # Integer knob => use min-max scaling + round
-                real_value = min_val + norm_val * (max_val - min_val)
-                real_value = round(real_value)
-                # dummy fix for precision errors produced during normalization 
-                if real_value >= max_val:
-                    real_value = max_val
-                if real_value <= min_val:
-                    real_value = min_val
-
-            elif knob_type == "boolean":
-                # Boolean knob => threshold rule
-                # If normalized < 0.5 => min_val, else => max_val
-                real_value = min_val if norm_val < 0.5 else max_val
+    def denormalize_batch(self, norm_matrix) -> list:
+        """
+        Convert an (N, K) matrix of normalized values (range 0-1), one candidate configuration
+        per row, back to a list of N configuration dictionaries.
+        """
+        return [dict(zip(self.knob_names, values)) for values in self._denormalize_rows(norm_matrix)]
 
-            else:
-                raise NotImplementedError(f"Unsupported knob type: {knob_type}")
+    def denormalize_into(self, normalized_values: list, out_row: list, knob_to_col: dict) -> list:
+        """
+        Denormalize one configuration straight into out_row: the value of each knob is written
+        at index knob_to_col[knob], no configuration dictionary is built.
+        Knobs missing from knob_to_col are skipped. Returns out_row.
+        """
+        if len(normalized_values) != len(self.knob_names):
+            raise ValueError(
+                f"Input list length {len(normalized_values)} does not match "
+                f"knob count {len(self.knob_names)}."
+            )
+        (values,) = self._denormalize_rows([normalized_values])
+        for knob, value in zip(self.knob_names, values):
+            col = knob_to_col.get(knob)
+            if col is not None:
+                out_row[col] = value
+        return out_row
+
+    def _denormalize_rows(self, norm_matrix) -> list:
+        """
+        Denormalize an (N, K) matrix into N lists of real values ordered like self.knob_names.
+        """
+        norm = np.asarray(norm_matrix, dtype=np.float64)
+        if norm.ndim != 2 or norm.shape[1] != len(self.knob_names):
+            raise ValueError(
+                f"Input matrix shape {norm.shape} does not match "
+                f"(N, {len(self.knob_names)})."
+            )
 
-            config_dict[knob] = real_value
+        # Clip to the unit box first: for exactly representable bounds the affine map then
+        # stays within [min, max] and no per-value range check is needed
+        norm = np.clip(norm, 0.0, 1.0)
+        # Integer knobs => min-max scaling + round
+        if _denorm_kernel is not None:
+            # Numba kernel: one fused loop, no NumPy temporaries
+            rounded = _denorm_kernel(norm, self._min, self._range, self._is_int)
+        else:
+            rounded = np.rint(self._min + norm * self._range)
+        # int() rather than astype(np.int64): some bounds (e.g. 2**64-1) exceed int64
+        int_rows = [list(map(int, row)) for row in rounded.tolist()]
+        # dummy fix for precision errors produced during normalization; the clip is done on the
+        # exact integer bounds since float64 cannot represent all of them
+        for i in self._inexact_idx:
+            spec = self._specs[i]
+            for values in int_rows:
+                values[i] = min(max(values[i], spec.min), spec.max)
+        # Boolean knobs => threshold rule: normalized < 0.5 => min_val, else => max_val
+        upper_rows = (norm >= 0.5).tolist()
 
-        return config_dict
+        for values, upper in zip(int_rows, upper_rows):
+            for i in self._bool_idx:
+                values[i] = self._bool_tokens[i][upper[i]]
+        return int_rows
 
     def normalize(self, config: dict) -> list:
         """
         Convert a configuration dictionary with real values into a list of normalized values (range 0-1).
         """
-        normalized_values = []
-        for knob in self.knob_names:
-            if knob not in config:
-                raise ValueError(f"Missing knob '{knob}' in configuration dictionary.")
-            real_value = config[knob]
-            knob_type, (min_val, max_val, default_val) = self.knob_dict[knob]
-
-            if knob_type == "integer":
-                if max_val == min_val:
-                    raise ValueError(f"For knob '{knob}', max_val equals min_val.")
-                norm_val = (real_value - min_val) / (max_val - min_val)
-
-            elif knob_type == "boolean":
-                if real_value == min_val:
-                    norm_val = 0.0
-                elif real_value == max_val:
-                    norm_val = 1.0
-                else:
-                    raise ValueError(
-                        f"For boolean knob '{knob}', value must equal either {min_val} or {max_val}."
-                    )
+        try:
+            real_values = [config[knob] for knob in self.knob_names]
+        except KeyError as e:
+            raise ValueError(f"Missing knob '{e.args[0]}' in configuration dictionary.") from None
 
+        # Boolean knobs => encode as 0 (min_val) / 1 (max_val)
+        for i in self._bool_idx:
+            tokens = self._bool_tokens[i]
+            if real_values[i] == tokens[0]:
+                real_values[i] = 0.0
+            elif real_values[i] == tokens[1]:
+                real_values[i] = 1.0
             else:
-                raise NotImplementedError(f"Unsupported knob type: {knob_type}")
+                raise ValueError(
+                    f"For boolean knob '{self.knob_names[i]}', value must equal either {tokens[0]} or {tokens[1]}."
+                )
 
-            normalized_values.append(norm_val)
+        return self.normalize_array(np.array(real_values, dtype=np.float64)).tolist()
 
-        return normalized_values
+    def normalize_array(self, values) -> np.ndarray:
+        """
+        Normalize real values already ordered like self.knob_names, without any dict lookups.
+        `values` is a (K,) vector or an (N, K) matrix; boolean knobs are given as
+        0 (min_val) or 1 (max_val). Returns a float64 array of the same shape.
+        """
+        real = np.asarray(values, dtype=np.float64)
+        if real.shape[-1:] != (len(self.knob_names),):
+            raise ValueError(
+                f"Input shape {real.shape} does not match knob count {len(self.knob_names)}."
+            )
+        return (real - self._min) * self._inv_range
+
+    def normalize_batch(self, values) -> np.ndarray:
+        """
+        Normalize an (N, K) matrix of real values ordered like self.knob_names in one pass,
+        e.g. columns read from a CSV. Boolean knobs are given by their tokens (e.g. "ON"/"OFF");
+        integer entries may be numbers or numeric strings.
+        Returns an (N, K) float64 array; entries that cannot be normalized (unknown boolean
+        token, non-numeric value) are NaN instead of raising, so callers can drop or replace rows.
+        """
+        raw = np.asarray(values, dtype=object)
+        if raw.ndim != 2 or raw.shape[1] != len(self.knob_names):
+            raise ValueError(
+                f"Input matrix shape {raw.shape} does not match "
+                f"(N, {len(self.knob_names)})."
+            )
+        real = np.empty(raw.shape, dtype=np.float64)
+        for i in range(raw.shape[1]):
+            col = raw[:, i]
+            tokens = self._bool_tokens[i]
+            if tokens is not None:
+                # Boolean knobs => encode as 0 (min_val) / 1 (max_val), NaN for anything else
+                real[:, i] = np.where(col == tokens[0], 0.0, np.where(col == tokens[1], 1.0, np.nan))
+                continue
+            try:
+                real[:, i] = col.astype(np.float64)
+            except (TypeError, ValueError):
+                # some entry is not numeric: convert one by one
+                real[:, i] = [_float_or_nan(v) for v in col]
+        return self.normalize_array(real)
 
     def get_default_normalized_values(self) -> list:
         """
         Returns a list of normalized values (range 0-1) corresponding to the default values
         for each knob as specified in the knob_dict.
         """
-        # Build a configuration dictionary from the default values for each knob.
-        default_config = {
-            knob: self.knob_dict[knob][1][2]  # Extract the default value
-            for knob in self.knob_names
-        }
-        # Use the normalize method to compute the normalized values.
-        return self.normalize(default_config)
+        if self._default_normalized is None:
+            # Build a configuration dictionary from the default values for each knob.
+            default_config = {
+                knob: spec.default
+                for knob, spec in zip(self.knob_names, self._specs)
+            }
+            # Use the normalize method to compute the normalized values.
+            self._default_normalized = self.normalize(default_config)
+        # Return a copy, callers may modify the list
+        return list(self._default_normalized)
+
+
+def _float_or_nan(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+@lru_cache(maxsize=8)
+def _cached_normalizer(knob_items: tuple) -> Normalizer:
+    return Normalizer({knob: [knob_type, list(bounds)] for knob, knob_type, bounds in knob_items})
+
+
+def make_normalizer(knob_dict: dict) -> Normalizer:
+    """
+    Return a Normalizer for `knob_dict`, shared with earlier calls for the same knobs and ranges.
+    Normalizers are not modified after construction, so sharing them is safe.
+    """
+    return _cached_normalizer(
+        tuple((knob, knob_type, tuple(bounds)) for knob, (knob_type, bounds) in knob_dict.items())
+    )
 
 
 if __name__ == "__main__":
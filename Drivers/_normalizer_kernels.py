@@ -0,0 +1,41 @@
+"""
+/*
+ * Software Name : DOT
+ * SPDX-FileCopyrightText: Copyright (c) Orange SA
+ * SPDX-License-Identifier: MIT
+ *
+ * This software is distributed under the MIT license,
+ * see the "LICENSE" file for more details
+ *
+ * Authors: see CONTRIBUTORS.md
+ * Software description: DOT: Dynamic Knob Selection and Online Sampling for Automated Database Tuning.
+ */
+"""
+
+# Optional Numba-compiled kernels for Normalizer. Numba is not a hard dependency:
+# when it is missing the kernels are None and Normalizer uses its NumPy path.
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def denorm(norm, mn, rng, is_int):
+        """
+        Fused denormalization of an (N, K) matrix: mn + norm * rng per knob, rounded
+        half-to-even (like np.rint) for integer knobs. Returns a float64 (N, K) array.
+        """
+        out = np.empty(norm.shape, dtype=np.float64)
+        for r in range(norm.shape[0]):
+            for i in range(norm.shape[1]):
+                v = mn[i] + norm[r, i] * rng[i]
+                if is_int[i]:
+                    v = np.rint(v)
+                out[r, i] = v
+        return out
+else:
+    denorm = None
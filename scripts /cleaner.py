@@ -15,46 +15,45 @@
 #!/usr/bin/env python3
 
 import sys
-import subprocess
 import os
 
-def kill_processes_by_term(search_term, force=False):
+def kill_processes_by_term(search_terms, force=False):
     """
-    Kills all processes that appear in `ps aux` output
-    and contain `search_term` in their command line.
+    Kills all processes whose command line (/proc/<pid>/cmdline) contains any of
+    `search_terms`, scanning the process table once for all of them.
 
-    :param search_term: The string to look for (as in grep).
+    :param search_terms: The strings to look for (as in grep); a single string is also accepted.
     :param force: If True, uses SIGKILL (kill -9). Otherwise, uses SIGTERM (kill -15).
     :return: A list of PIDs that were terminated.
     """
-    try:
-        # Run `ps aux` and capture the output
-        result = subprocess.run(["ps", "aux"], capture_output=True, text=True, check=True)
-        lines = result.stdout.strip().split("\n")
-    except subprocess.CalledProcessError as e:
-        print(f"Error running ps aux: {e}")
-        return []
+    if isinstance(search_terms, str):
+        search_terms = [search_terms]
 
-    # The first line of `ps aux` is headers (USER, PID, %CPU, etc.)
-    # We'll skip it and iterate over the rest
-    lines = lines[1:]
+    # Read command lines straight from /proc instead of running and parsing `ps`
+    processes = {}
+    for pid_str in os.listdir("/proc"):
+        if not pid_str.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid_str}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue  # process exited meanwhile, or is not readable
+        if cmdline:  # kernel threads have an empty command line
+            processes[int(pid_str)] = cmdline.replace(b"\x00", b" ").decode(errors="replace").strip()
 
     terminated_pids = []
+    own_pid = os.getpid()
+    sig = 9 if force else 15  # 9 = SIGKILL, 15 = SIGTERM
 
-    for line in lines:
-        # If the line has the search term AND is not just the grep itself,
+    for pid, args in processes.items():
+        # If the command line has a search term AND is not just a grep (or this script) itself,
         # we assume it's a process we want to kill
-        if search_term in line and "grep" not in line:
-            columns = line.split(None, 10)  # split by whitespace, up to 11 columns total
-            # columns[1] should be the PID in the typical ps aux format
-            try:
-                pid = int(columns[1])
-            except (IndexError, ValueError):
-                continue  # skip if we can't parse a PID
-
+        if pid == own_pid or "grep" in args:
+            continue
+        if any(term in args for term in search_terms):
             # Attempt to kill this process
             try:
-                sig = 9 if force else 15  # 9 = SIGKILL, 15 = SIGTERM
                 os.kill(pid, sig)
                 terminated_pids.append(pid)
             except ProcessLookupError:
@@ -67,19 +66,18 @@ def kill_processes_by_term(search_term, force=False):
     return terminated_pids
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python kill_by_grep.py <search_term> [--force]")
+    # Search terms are all arguments except the `--force` flag
+    search_terms = [arg for arg in sys.argv[1:] if arg != "--force"]
+    if not search_terms:
+        print("Usage: python kill_by_grep.py <search_term> [<search_term> ...] [--force]")
         sys.exit(1)
 
-    # The first argument is the search term
-    search_term = sys.argv[1]
-
     # Optional `--force` argument to use SIGKILL (kill -9)
     force_kill = ("--force" in sys.argv)
 
-    pids = kill_processes_by_term(search_term, force=force_kill)
+    pids = kill_processes_by_term(search_terms, force=force_kill)
 
     if pids:
         print(f"Terminated processes with PIDs: {pids}")
     else:
-        print(f"No processes matching '{search_term}' were found.")
+        print(f"No processes matching {search_terms} were found.")
@@ -12,10 +12,15 @@
  */
 """
 
+import io
+import logging
 import paramiko
+import queue
+import select
+import shlex
 import threading
 import sys
-import time
+from logging.handlers import QueueHandler, QueueListener
 
 # List of remote hosts
 # hosts = ["192.168.0.63"]
@@ -46,6 +51,30 @@ commands = [
     'cd /home/cloud/tpcc-mysql && ./tpcc_load -h127.0.0.1 -d tpcc100 -u dbbert -pdbbert -w 100'
 ]
 
+# All commands run as one remote script (one channel per host), stopping at the first failure.
+# Each command is announced with an echoed marker so the log still shows where it starts.
+combined_command = "set -e\n" + "\n".join(
+    f"echo {shlex.quote('=' * 50)}\necho {shlex.quote(f'Executing command: {cmd}')}\n{cmd}"
+    for cmd in commands
+)
+
+# Console output of all host threads goes through a queue to one listener thread,
+# so host threads never block on stdout
+logger = logging.getLogger("load_tpcc")
+logger.setLevel(logging.INFO)
+log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(log_queue))
+
+
+def start_log_listener():
+    """Switch stdout to block buffering and start the thread writing queued log records to it."""
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, line_buffering=False, write_through=False)
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, console_handler)
+    listener.start()
+    return listener
+
 
 def execute_and_log(ssh, host, cmd, log_file):
     """Execute a command on the remote host and write output (stdout/stderr) to the log file in real time."""
@@ -58,36 +87,38 @@ def execute_and_log(ssh, host, cmd, log_file):
         log_file.write(f"Failed to execute command: {e}\n")
         return
 
-    # Loop until the command finishes.
-    while not stdout.channel.exit_status_ready():
+    chan = stdout.channel
+    # Loop until the command finishes, blocking in select() until the channel has output.
+    while not chan.exit_status_ready():
+        readable, _, _ = select.select([chan], [], [], 1.0)
+        if chan not in readable:
+            continue
         # If there's output on stdout, read and log it.
-        if stdout.channel.recv_ready():
-            out = stdout.channel.recv(1024).decode('utf-8')
+        while chan.recv_ready():
+            out = chan.recv(65536).decode('utf-8', errors='replace')
             if out:
                 log_file.write(out)
                 log_file.flush()
-                print(f"[{host}] {out}", end="")
+                logger.info("[%s] %s", host, out.rstrip("\n"))
         # If there's output on stderr, read and log it.
-        if stderr.channel.recv_ready():
-            err = stderr.channel.recv(1024).decode('utf-8')
+        while chan.recv_stderr_ready():
+            err = chan.recv_stderr(65536).decode('utf-8', errors='replace')
             if err:
                 log_file.write(err)
                 log_file.flush()
-                print(f"[{host}][stderr] {err}", end="")
-        # Short sleep to avoid busy waiting.
-        time.sleep(0.1)
+                logger.info("[%s][stderr] %s", host, err.rstrip("\n"))
 
     # Read any remaining output after the command has finished.
     remaining_out = stdout.read().decode('utf-8')
     if remaining_out:
         log_file.write(remaining_out)
         log_file.flush()
-        print(f"[{host}] {remaining_out}", end="")
+        logger.info("[%s] %s", host, remaining_out.rstrip("\n"))
     remaining_err = stderr.read().decode('utf-8')
     if remaining_err:
         log_file.write(remaining_err)
         log_file.flush()
-        print(f"[{host}][stderr] {remaining_err}", end="")
+        logger.info("[%s][stderr] %s", host, remaining_err.rstrip("\n"))
 
 def run_commands_on_host(host, key):
     log_filename = f"/home/cloud/Selectune/scripts/tpcc_load_logs6/tpcc_load_{host.replace('.', '_')}.log"
@@ -98,27 +129,23 @@ def run_commands_on_host(host, key):
             try:
                 ssh.connect(hostname=host, username=username, pkey=key)
                 log_file.write(f"Connected to {host}\n")
-                print(f"\nConnected to {host}")
+                logger.info("Connected to %s", host)
             except Exception as e:
                 log_file.write(f"Connection failed: {e}\n")
-                print(f"\n[{host}] Connection failed: {e}")
+                logger.info("[%s] Connection failed: %s", host, e)
                 return
 
-            # Execute each command sequentially.
-            for cmd in commands:
-                log_file.write("\n" + "=" * 50 + "\n")
-                log_file.write(f"Executing command: {cmd}\n")
-                log_file.flush()
-                print(f"\n[{host}] Executing: {cmd}")
-                execute_and_log(ssh, host, cmd, log_file)
-                log_file.write("\nCommand finished.\n")
-                log_file.flush()
+            # Execute all commands sequentially in a single remote shell.
+            logger.info("[%s] Executing %d commands", host, len(commands))
+            execute_and_log(ssh, host, combined_command, log_file)
+            log_file.write("\nCommands finished.\n")
+            log_file.flush()
 
             ssh.close()
             log_file.write("Connection closed.\n")
-            print(f"[{host}] Connection closed. Log written to {log_filename}")
+            logger.info("[%s] Connection closed. Log written to %s", host, log_filename)
     except Exception as e:
-        print(f"[{host}] Error writing log: {e}")
+        logger.info("[%s] Error writing log: %s", host, e)
 
 def main():
     try:
@@ -127,16 +154,22 @@ def main():
         print(f"Error loading SSH key from {ssh_key_path}: {e}")
         sys.exit(1)
 
-    threads = []
-    for host in hosts:
-        t = threading.Thread(target=run_commands_on_host, args=(host, key))
-        t.start()
-        threads.append(t)
+    listener = start_log_listener()
+    try:
+        threads = []
+        for host in hosts:
+            t = threading.Thread(target=run_commands_on_host, args=(host, key))
+            t.start()
+            threads.append(t)
 
-    for t in threads:
-        t.join()
+        for t in threads:
+            t.join()
 
-    print("\nAll commands executed on all hosts.")
+        logger.info("All commands executed on all hosts.")
+    finally:
+        # Flush the remaining queued records
+        listener.stop()
+        sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
@@ -17,17 +17,19 @@
 Deploy TPCH on a fleet of MySQL hosts, always replacing any existing TPCH
 schema. Detailed logs stream to stdout and to deploy_tpch.log.
 
-Requires:  pip install paramiko
+All hosts are handled concurrently on one asyncio event loop.
+
+Requires:  pip install asyncssh
 """
 
-import concurrent.futures
+import asyncio
 import logging
 import pathlib
 import sys
 from logging.handlers import RotatingFileHandler
 from typing import List
 
-import paramiko
+import asyncssh
 
 
 # ‑‑‑ editable settings ‑‑‑ ----------------------------------------------------
@@ -41,7 +43,6 @@ SSH_KEY_PATH    = "/home/cloud/.ssh/key"
 REMOTE_DIR      = "/home/cloud/dbbert/tpch/tpchdata"
 MYSQL_USER      = "dbbert"
 MYSQL_PASSWORD  = "dbbert"
-THREADS         = min(10, len(hosts))
 
 LOG_FILE        = "deploy_tpch.log"          # rotating 5 MB × 3 backups
 LOG_LEVEL       = logging.INFO
@@ -53,7 +54,7 @@ logger = logging.getLogger("deploy_tpch")
 logger.setLevel(LOG_LEVEL)
 
 formatter = logging.Formatter(
-    "%(asctime)s [%(levelname)s] %(threadName)s %(message)s",
+    "%(asctime)s [%(levelname)s] %(message)s",
     datefmt="%H:%M:%S")
 
 console_handler = logging.StreamHandler(sys.stdout)
@@ -66,23 +67,29 @@ logger.addHandler(file_handler)
 # -----------------------------------------------------------------------------
 
 
-def run_cmd(ssh: paramiko.SSHClient, cmd: str, host: str) -> None:
+async def _log_stream(stream: asyncssh.SSHReader, host: str, level: int) -> None:
+    """Log every line read from `stream` until EOF."""
+    async for line in stream:
+        logger.log(level, "[%s] %s", host, line.rstrip())
+
+
+async def run_cmd(conn: asyncssh.SSHClientConnection, cmd: str, host: str) -> None:
     """Execute `cmd` on `host`, streaming stdout/stderr line‑by‑line."""
     logger.debug("[%s] RUN: %s", host, cmd)
-    stdin, stdout, stderr = ssh.exec_command(cmd, get_pty=True)
-    # Stream output while command runs
-    for line in iter(stdout.readline, ""):
-        if line:
-            logger.info("[%s] %s", host, line.rstrip())
-    for line in iter(stderr.readline, ""):
-        if line:
-            logger.warning("[%s] %s", host, line.rstrip())
-    exit_status = stdout.channel.recv_exit_status()
-    if exit_status != 0:
-        raise RuntimeError(f"[{host}] command exited with status {exit_status}")
-
-
-def install_tpch(ssh: paramiko.SSHClient, host: str) -> None:
+    # Request a pseudo-terminal so that output streams unbuffered
+    async with conn.create_process(cmd, term_type="dumb") as process:
+        # Stream output while command runs, draining both streams concurrently so a
+        # command that fills its stderr window cannot stall behind unread stdout
+        await asyncio.gather(
+            _log_stream(process.stdout, host, logging.INFO),
+            _log_stream(process.stderr, host, logging.WARNING),
+        )
+        result = await process.wait()
+    if result.exit_status != 0:
+        raise RuntimeError(f"[{host}] command exited with status {result.exit_status}")
+
+
+async def install_tpch(conn: asyncssh.SSHClientConnection, host: str) -> None:
     """Drop and reload TPCH."""
     logger.info("[%s] Starting TPCH (re)installation …", host)
     cmds = [
@@ -101,36 +108,33 @@ def install_tpch(ssh: paramiko.SSHClient, host: str) -> None:
         f"mysql -u {MYSQL_USER} -p{MYSQL_PASSWORD} tpch < index.sql",
         'echo "TPCH installation finished ✔"',
     ]
-    run_cmd(ssh, " && ".join(cmds), host)
+    await run_cmd(conn, " && ".join(cmds), host)
 
 
-def process_host(host: str) -> str:
+async def process_host(host: str) -> str:
     key = pathlib.Path(SSH_KEY_PATH).expanduser()
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     try:
         logger.info("[%s] Connecting …", host)
-        ssh.connect(hostname=host, username=SSH_USER, key_filename=str(key))
-        install_tpch(ssh, host)
+        # known_hosts=None: accept unknown host keys, like paramiko's AutoAddPolicy
+        async with asyncssh.connect(host, username=SSH_USER, client_keys=[str(key)],
+                                    known_hosts=None) as conn:
+            await install_tpch(conn, host)
         result = f"[{host}] ✔ TPCH installed"
     except Exception as exc:
         logger.exception("[%s] error", host)
         result = f"[{host}] ✖ {exc}"
-    finally:
-        ssh.close()
     return result
 
 
-def main() -> None:
-    logger.info("Deploying to %d hosts using %d thread(s)", len(hosts), THREADS)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=THREADS) as pool:
-        for msg in pool.map(process_host, hosts):
-            logger.info(msg)
+async def main() -> None:
+    logger.info("Deploying to %d hosts concurrently", len(hosts))
+    for msg in await asyncio.gather(*(process_host(host) for host in hosts)):
+        logger.info(msg)
     logger.info("All done.")
 
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         logger.warning("Cancelled by user.")
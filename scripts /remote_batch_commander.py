@@ -12,10 +12,12 @@
  */
 """
 
+import logging
 import paramiko
+import queue
 import sys
 import threading
-import time
+from logging.handlers import QueueHandler, QueueListener
 
 # List of remote hosts
 hosts = [
@@ -28,18 +30,35 @@ hosts = [
 ssh_key_path = "/home/cloud/.ssh/key"
 username = "cloud"  # Replace with your actual SSH username
 
+# Output of the reader threads goes through a queue to one listener thread,
+# so reader threads never block on stdout
+logger = logging.getLogger("batch_commander")
+logger.setLevel(logging.INFO)
+log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(log_queue))
+
+
+def start_log_listener():
+    """Start the thread writing queued log records to stdout."""
+    # stdout stays line-flushed here: this is an interactive session
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, console_handler)
+    listener.start()
+    return listener
+
 def read_from_channel(host, channel):
     """Continuously read output from the remote interactive shell."""
+    # Block in recv() until output arrives instead of polling
+    channel.settimeout(None)
     while True:
         try:
-            if channel.recv_ready():
-                data = channel.recv(1024).decode('utf-8')
-                if data:
-                    print(f"\n--- Output from {host} ---\n{data}")
-            else:
-                time.sleep(0.1)
+            data = channel.recv(65536)
+            if not data:
+                break  # channel closed
+            logger.info("\n--- Output from %s ---\n%s", host, data.decode('utf-8', errors='replace'))
         except Exception as e:
-            print(f"Error reading from {host}: {e}")
+            logger.info("Error reading from %s: %s", host, e)
             break
 
 def main():
@@ -49,6 +68,8 @@ def main():
         print(f"Error loading SSH key from {ssh_key_path}: {e}")
         sys.exit(1)
 
+    listener = start_log_listener()
+
     connections = {}  # Maps host -> SSHClient
     channels = {}     # Maps host -> interactive shell channel
 
@@ -97,6 +118,7 @@ def main():
         for host, ssh in connections.items():
             ssh.close()
         print("All connections closed.")
+        listener.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,49 @@
+"""
+/*
+ * Software Name : DOT
+ * SPDX-FileCopyrightText: Copyright (c) Orange SA
+ * SPDX-License-Identifier: MIT
+ *
+ * This software is distributed under the MIT license,
+ * see the "LICENSE" file for more details
+ *
+ * Authors: see CONTRIBUTORS.md
+ * Software description: DOT: Dynamic Knob Selection and Online Sampling for Automated Database Tuning.
+ */
+"""
+
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "tuner"), os.path.join(ROOT, "Drivers")]
+
+from main import run_optimization_iteration  # noqa: E402
+from Normalizer import make_normalizer  # noqa: E402
+
+
+def test_two_debug_rounds(tmp_path):
+    full_knob_dict = {
+        "table_open_cache": ["integer", [4000, 524288, 4000]],
+        "innodb_buffer_pool_instances": ["integer", [1, 64, 8]],
+        "innodb_random_read_ahead": ["boolean", ["ON", "OFF", "OFF"]],
+    }
+    knobs = list(full_knob_dict)
+    normalizer = make_normalizer(full_knob_dict)
+    csv_path = str(tmp_path / "debug.csv")
+
+    x0, y0 = None, None
+    for round_num in range(2):
+        # the second round gets the ndarray func_vals of the first one, as in main()
+        x0, y0 = run_optimization_iteration(
+            None, normalizer, full_knob_dict, {}, knobs, "sysbench", x0, y0,
+            initial_pts=2, n_calls=5, random_state=round_num, models_dir=str(tmp_path),
+            cfg_name="debug", intermediate_csv=csv_path, debug=True,
+        )
+        assert isinstance(y0, np.ndarray)
+        assert len(x0) == len(y0) == 5 * (round_num + 1)
+
+    with open(csv_path) as f:
+        assert len(f.read().splitlines()) == 1 + 10
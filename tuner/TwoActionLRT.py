@@ -12,8 +12,11 @@
  */
 """
 
+import logging
 import math
 
+logger = logging.getLogger(__name__)
+
 class TwoActionLRT:
     def __init__(self):
         """
@@ -23,9 +26,10 @@ class TwoActionLRT:
           0 = decrease (down)
           1 = increase (up)
         """
-        print("Initialize 2-action Likelihood-Ratio Test Bandit")
+        logger.info("Initialize 2-action Likelihood-Ratio Test Bandit")
         self.success = [1.0, 1.0]  # Start with smoothing
         self.failure = [1.0, 1.0]
+        self.total = [2.0, 2.0]  # success + failure, kept in step by update()
         self._last_action = None
 
     def select(self) -> int:
@@ -36,18 +40,17 @@ class TwoActionLRT:
         --------
         action: int (0 or 1)
         """
-        # Compute empirical success rates
-        success_rates = [
-            self.success[i] / (self.success[i] + self.failure[i]) for i in range(2)
-        ]
-
-        # Compute likelihood ratio
-        likelihood_ratio = math.log((success_rates[1] + 1e-8) / (success_rates[0] + 1e-8))
-
-        # Decision: action 1 if LR positive, else action 0
-        action = 1 if likelihood_ratio > 0 else 0
-
-        print(f"LRT: success_rates={success_rates}, likelihood_ratio={likelihood_ratio:.4f}, chosen action={action}")
+        # Decision: action 1 if the log likelihood ratio log(rate_1 / rate_0) is positive,
+        # i.e. rate_1 > rate_0, compared cross-multiplied to avoid the divisions and the log
+        s0, s1 = self.success
+        t0, t1 = self.total
+        action = int(s1 * t0 > s0 * t1)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            success_rates = [s0 / t0, s1 / t1]
+            likelihood_ratio = math.log(success_rates[1] / success_rates[0])
+            logger.debug("LRT: success_rates=%s, likelihood_ratio=%.4f, chosen action=%s",
+                         success_rates, likelihood_ratio, action)
 
         self._last_action = action
         return action
@@ -61,16 +64,17 @@ class TwoActionLRT:
         reward: float (0 or 1)
         """
         if self._last_action is None:
-            print("No previous select() call—skipping update")
+            logger.debug("No previous select() call—skipping update")
             return
 
         action = self._last_action
         self.success[action] += reward
         self.failure[action] += (1.0 - reward)
+        self.total[action] += 1.0
 
-        print(f"Updating action {action} with reward {reward}")
-        print("New success counts:", self.success)
-        print("New failure counts:", self.failure)
+        logger.debug("Updating action %s with reward %s", action, reward)
+        logger.debug("New success counts: %s", self.success)
+        logger.debug("New failure counts: %s", self.failure)
 
         self._last_action = None
 
@@ -83,9 +87,11 @@ class TwoActionLRT:
         --------
         reward: float (0 or 1)
         """
-        improvement_ratio = (cur_perf - best_perf) / (best_perf if best_perf != 0 else 1.0)
-        improvement_per_step = improvement_ratio / n_calls
+        # one division: improvement / (best_perf * n_calls), a best_perf of 0 counts as 1
+        inv_best_scaled = 1.0 / ((best_perf if best_perf != 0 else 1.0) * n_calls)
+        improvement_per_step = (cur_perf - best_perf) * inv_best_scaled
         reward_val = 1.0 if improvement_per_step > threshold else 0.0
 
-        print(f"cur_perf: {cur_perf}, best_perf: {best_perf}, improvement_per_step: {improvement_per_step}, reward: {reward_val}")
+        logger.debug("cur_perf: %s, best_perf: %s, improvement_per_step: %s, reward: %s",
+                     cur_perf, best_perf, improvement_per_step, reward_val)
         return reward_val
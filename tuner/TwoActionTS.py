@@ -12,11 +12,18 @@
  */
 """
 
+import logging
 import random
-from scipy.stats import beta
-import math
+import numpy as np
+from _bandit_base import SigmoidReward, approx_beta_draws
+from _bandit_kernels import ts_choose
+
+logger = logging.getLogger(__name__)
+
+class TwoActionTS(SigmoidReward):
+    # Beta samples are drawn in blocks of this size per action
+    SAMPLE_BUFFER = 256
 
-class TwoActionTS:
     def __init__(self, epsilon: float = 0.1):
         """
         Two-action Thompson Sampling with ε-greedy exploration.
@@ -30,65 +37,70 @@ class TwoActionTS:
         epsilon : float
             Probability of taking a random action instead of TS.
         """
-        print("initialize 2-action bandit")
+        logger.info("initialize 2-action bandit")
         self.epsilon = epsilon
-        # α and β for each of the 2 actions
-        self.alpha = [1.0, 1.0]
-        self.beta  = [1.0, 1.0]
+        # α and β for each of the 2 actions, updated in place
+        self.alpha = np.ones(2)
+        self.beta  = np.ones(2)
+        self._rng = np.random.default_rng()
+        # Pre-drawn posterior samples per action; a position at SAMPLE_BUFFER means "refill"
+        self._samples = np.empty((2, self.SAMPLE_BUFFER))
+        self._pos = [self.SAMPLE_BUFFER, self.SAMPLE_BUFFER]
         self._last_action = None
 
     def select(self) -> int:
         """
         Choose an action:
           - With probability ε: pick uniformly at random.
-          - Else: sample θ_i ~ Beta(α[i],β[i]) for i=0,1 and pick argmax.
+          - Else: sample θ_i ~ Beta(α[i],β[i]) for i=0,1 and pick argmax
+            (normal approximation of the Beta once α+β > 50 for both actions).
 
         Remembers action for the subsequent update().
         """
         if random.random() < self.epsilon:
             action = random.randrange(2)
-            print(f"ε-explore: randomly chosen action {action}")
+            logger.debug("ε-explore: randomly chosen action %s", action)
+        elif (θ := approx_beta_draws(self._rng, self.alpha, self.beta)) is not None:
+            # long-run posteriors: normal approximation, both arms in one draw
+            action = 0 if θ[0] >= θ[1] else 1
+            logger.debug("TS-sample (normal approx.): θ_samples=%s, chosen action %s", θ, action)
+        elif ts_choose is not None:
+            # compiled decision: both draws and the argmax in one call
+            action = ts_choose(self.alpha, self.beta)
+            logger.debug("TS-sample: chosen action %s", action)
         else:
-            θ = [beta.rvs(self.alpha[i], self.beta[i]) for i in range(2)]
-            action = max(range(2), key=lambda i: θ[i])
-            print(f"TS-sample: θ_samples={θ}, chosen action {action}")
+            θ = [self._draw(0), self._draw(1)]
+            action = 0 if θ[0] >= θ[1] else 1
+            logger.debug("TS-sample: θ_samples=%s, chosen action %s", θ, action)
 
         self._last_action = action
         return action
 
+    def _draw(self, a: int) -> float:
+        """
+        Next θ ~ Beta(α[a], β[a]) from the action's buffer, refilling it when exhausted.
+        """
+        pos = self._pos[a]
+        if pos >= self.SAMPLE_BUFFER:
+            self._samples[a] = self._rng.beta(self.alpha[a], self.beta[a], size=self.SAMPLE_BUFFER)
+            pos = 0
+        self._pos[a] = pos + 1
+        return float(self._samples[a, pos])
+
     def update(self, reward: float):
         """
         Update the Beta posterior for the last-chosen action using reward ∈ [0,1].
         """
         if self._last_action is None:
-            print("No previous select() call—skipping update")
+            logger.debug("No previous select() call—skipping update")
             return
 
         a = self._last_action
-        print(f"updating action {a} with reward {reward}")
+        logger.debug("updating action %s with reward %s", a, reward)
         self.alpha[a] += reward
         self.beta[a]  += (1.0 - reward)
+        # the posterior changed, its pre-drawn samples are stale
+        self._pos[a] = self.SAMPLE_BUFFER
         self._last_action = None
-        print("new α:", self.alpha)
-        print("new β:", self.beta)
-
-
-    @staticmethod
-    def reward(cur_perf: float, best_perf: float, n_calls: int, scale: float = 500.0) -> float:
-        """
-        Sigmoidal reward based on per-step improvement.
-        """
-        print("calculating reward")
-        print("cur_perf:", cur_perf)
-        print("best_perf:", best_perf)
-        print("n_calls:", n_calls)
-        try:
-            improvement_ratio = (cur_perf - best_perf) / best_perf
-        except ZeroDivisionError:
-            improvement_ratio = 1.0
-        print("improvement_ratio:", improvement_ratio)
-        improvement_per_step = improvement_ratio / n_calls
-        # steep sigmoid centered at 0.1% per call
-        reward_val = 1.0 / (1.0 + math.exp(-scale * (improvement_per_step - 0.001)))
-        print("reward:", reward_val)
-        return reward_val
+        logger.debug("new α: %s", self.alpha)
+        logger.debug("new β: %s", self.beta)
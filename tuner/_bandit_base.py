@@ -0,0 +1,69 @@
+"""
+/*
+ * Software Name : DOT
+ * SPDX-FileCopyrightText: Copyright (c) Orange SA
+ * SPDX-License-Identifier: MIT
+ *
+ * This software is distributed under the MIT license,
+ * see the "LICENSE" file for more details
+ *
+ * Authors: see CONTRIBUTORS.md
+ * Software description: DOT: Dynamic Knob Selection and Online Sampling for Automated Database Tuning.
+ */
+"""
+
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SigmoidReward:
+    """
+    Sigmoidal per-step improvement reward shared by the Thompson-sampling bandits.
+    """
+
+    @staticmethod
+    def reward_batch(cur_perf, best_perf, n_calls, scale: float = 500.0) -> np.ndarray:
+        """
+        Vectorized reward: accepts scalars or arrays (broadcast together) and
+        returns an array of rewards in [0, 1].
+        An improvement ratio over a best_perf of 0 counts as 1.0.
+        """
+        cur_perf = np.asarray(cur_perf, dtype=np.float64)
+        best_perf = np.asarray(best_perf, dtype=np.float64)
+        zero_best = best_perf == 0
+        improvement_ratio = np.divide(
+            cur_perf - best_perf, best_perf, out=np.ones(np.broadcast(cur_perf, best_perf).shape), where=~zero_best
+        )
+        improvement_per_step = improvement_ratio / n_calls
+        # steep sigmoid centered at 0.1% per call
+        with np.errstate(over="ignore"):
+            return 1.0 / (1.0 + np.exp(-scale * (improvement_per_step - 0.001)))
+
+    @staticmethod
+    def reward(cur_perf: float, best_perf: float, n_calls: int, scale: float = 500.0) -> float:
+        """
+        Sigmoidal reward based on per-step improvement.
+        """
+        reward_val = float(SigmoidReward.reward_batch(cur_perf, best_perf, n_calls, scale))
+        logger.debug("cur_perf: %s, best_perf: %s, n_calls: %s, reward: %s", cur_perf, best_perf, n_calls, reward_val)
+        return reward_val
+
+
+# Above this α+β a Beta posterior is sampled through its normal approximation
+BETA_NORMAL_THRESHOLD = 50
+
+
+def approx_beta_draws(rng, alpha, beta):
+    """
+    θ_i for every arm from Normal(μ, μ(1-μ)/(α+β+1)), μ = α/(α+β), clipped to [0, 1]:
+    the normal approximation of Beta(α, β), accurate once α+β is large.
+    Returns None when some arm has α+β <= BETA_NORMAL_THRESHOLD; the caller then samples Beta exactly.
+    """
+    total = alpha + beta
+    if total.min() <= BETA_NORMAL_THRESHOLD:
+        return None
+    mu = alpha / total
+    theta = mu + np.sqrt(mu * (1.0 - mu) / (total + 1.0)) * rng.standard_normal(total.shape)
+    return np.clip(theta, 0.0, 1.0)
@@ -0,0 +1,37 @@
+"""
+/*
+ * Software Name : DOT
+ * SPDX-FileCopyrightText: Copyright (c) Orange SA
+ * SPDX-License-Identifier: MIT
+ *
+ * This software is distributed under the MIT license,
+ * see the "LICENSE" file for more details
+ *
+ * Authors: see CONTRIBUTORS.md
+ * Software description: DOT: Dynamic Knob Selection and Online Sampling for Automated Database Tuning.
+ */
+"""
+
+# Optional Numba-compiled kernel for the Thompson-sampling bandits. Numba is not a hard
+# dependency: when it is missing ts_choose is None and the bandits use their buffered
+# NumPy sampling instead.
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def ts_choose(alpha, beta):
+        """
+        Draw θ_i ~ Beta(alpha[i], beta[i]) for the two arms and return the argmax
+        (ties go to arm 0). alpha and beta are float64 arrays of shape (2,).
+        """
+        theta0 = np.random.beta(alpha[0], beta[0])
+        theta1 = np.random.beta(alpha[1], beta[1])
+        return 0 if theta0 >= theta1 else 1
+else:
+    ts_choose = None
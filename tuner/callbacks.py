@@ -14,7 +14,7 @@
 
 import os
 import csv
-from datetime import datetime
+import time
 
 class LoggingCallback:
     def __init__(self, normalizer, models_dir, cfg_name, full_knob_dict,
@@ -26,34 +26,51 @@ class LoggingCallback:
         self.intermediate_csv_file = intermediate_csv_file
         self.frozen_values = frozen_values
 
+        # Static part of every row: knob order, and the frozen/default value of each knob
+        self._knob_keys = tuple(self.full_knob_dict.keys())
+        self._default_row = [frozen_values.get(k, self.full_knob_dict[k][1][2]) for k in self._knob_keys]
+        self._idx = {k: i for i, k in enumerate(self._knob_keys)}
+
         if not os.path.exists(self.intermediate_csv_file) or os.path.getsize(self.intermediate_csv_file) == 0:
             with open(self.intermediate_csv_file, "w", newline="") as f:
                 writer = csv.writer(f)
-                header = ["iteration", "timestamp", "TPS"] + list(self.full_knob_dict.keys())
+                header = ["iteration", "timestamp", "TPS", *self._knob_keys]
                 writer.writerow(header)
 
+        # One line-buffered handle for the whole optimization, instead of reopening the file per iteration
+        self._fh = open(self.intermediate_csv_file, "a", newline="", buffering=1)
+        self._writer = csv.writer(self._fh)
+
     def __call__(self, res):
         iteration_num = len(res.x_iters)
         current_tps = -res.func_vals[-1]
         current_norm = res.x_iters[-1]
-        current_cfg = self.normalizer.denormalize(current_norm)
-        now_str = datetime.now().isoformat()
-
-        combined = {}
-        for knob, vals in self.full_knob_dict.items():
-            if knob in current_cfg:
-                combined[knob] = current_cfg[knob]
-            elif knob in self.frozen_values:
-                combined[knob] = self.frozen_values[knob]
-            else:
-                combined[knob] = vals[1][2]
-
-        with open(self.intermediate_csv_file, "a", newline="") as f:
-            writer = csv.writer(f)
-            if f.tell() == 0:
-                header = ["iteration", "timestamp", "TPS"] + list(self.full_knob_dict.keys())
-                writer.writerow(header)
-            row = [iteration_num, now_str, current_tps] + [combined[k] for k in self.full_knob_dict.keys()]
-            writer.writerow(row)
+        # raw epoch nanoseconds, no datetime formatting per iteration;
+        # datetime.fromtimestamp(ns / 1e9) gives the wall-clock time back
+        now_ns = time.time_ns()
+
+        # Start from the frozen/default template and write the tuned knobs over it
+        row_tail = self.normalizer.denormalize_into(current_norm, self._default_row.copy(), self._idx)
+
+        # the header was written in __init__
+        row = [iteration_num, now_ns, current_tps, *row_tail]
+        self._writer.writerow(row)
+        self._fh.flush()
 
         return False
+
+    def close(self):
+        if self._fh is not None and not self._fh.closed:
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # _fh is missing if __init__ failed before opening it
+        if getattr(self, "_fh", None) is not None:
+            self.close()
@@ -16,6 +16,12 @@ import os
 import sys
 import json
 import argparse
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def parse_arguments():
@@ -38,9 +44,25 @@ def parse_arguments():
     return parser.parse_args()
 
 
+@lru_cache(maxsize=4)
+def _load_config_cached(config_path, mtime):
+    # mtime is part of the cache key only: an edited file is parsed again
+    with open(config_path, "rb") as f:
+        data = f.read()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. integers beyond 64 bits, which the stdlib parser accepts
+    return json.loads(data)
+
+
 def load_config(config_path):
+    """
+    Parse the JSON config, with orjson when it is installed. Parses are memoized on
+    (path, mtime), so the returned dict is shared between calls and must not be modified.
+    """
     if not os.path.isfile(config_path):
         print(f"ERROR: Config file not found: {config_path}")
         sys.exit(1)
-    with open(config_path, "r") as f:
-        return json.load(f)
\ No newline at end of file
+    return _load_config_cached(config_path, os.path.getmtime(config_path))
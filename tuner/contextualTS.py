@@ -12,11 +12,18 @@
  */
 """
 
+import logging
 import random
-from scipy.stats import beta
-import math
+import numpy as np
+from _bandit_base import SigmoidReward, approx_beta_draws
+from _bandit_kernels import ts_choose
+
+logger = logging.getLogger(__name__)
+
+class ContextualTS(SigmoidReward):
+    # Beta samples are drawn in blocks of this size per (context, action)
+    SAMPLE_BUFFER = 256
 
-class ContextualTS:
     def __init__(self, epsilon: float = 0.1):
         """
         Contextual Thompson Sampling with ε-greedy exploration.
@@ -26,11 +33,16 @@ class ContextualTS:
         epsilon : float
             Probability of taking a random action instead of TS.
         """
-        print("initialize bandit")
+        logger.info("initialize bandit")
         self.epsilon = epsilon
         # contexts 0 and 1, actions 0=no_add, 1=add_5
-        self.alpha = {0: [1.0, 1.0], 1: [1.0, 1.0]}
-        self.beta  = {0: [1.0, 1.0], 1: [1.0, 1.0]}
+        # indexed [context, action], updated in place
+        self.alpha = np.ones((2, 2))
+        self.beta  = np.ones((2, 2))
+        self._rng = np.random.default_rng()
+        # Pre-drawn posterior samples per (context, action); a position at SAMPLE_BUFFER means "refill"
+        self._samples = np.empty((2, 2, self.SAMPLE_BUFFER))
+        self._pos = np.full((2, 2), self.SAMPLE_BUFFER)
         self._last_context = None
         self._last_action  = None
 
@@ -43,62 +55,60 @@ class ContextualTS:
         # ε-greedy: random exploration
         if random.random() < self.epsilon:
             action = random.choice([0, 1])
-            print(f"ε-explore: randomly chosen action {action}")
+            logger.debug("ε-explore: randomly chosen action %s", action)
+        elif (samples := approx_beta_draws(self._rng, self.alpha[context], self.beta[context])) is not None:
+            # Thompson Sampling, long-run posteriors: normal approximation, both actions in one draw
+            action = 0 if samples[0] >= samples[1] else 1
+            logger.debug("TS-sample (normal approx.): θ_samples=%s, chosen action %s", samples, action)
+        elif ts_choose is not None:
+            # Thompson Sampling, compiled: both draws and the argmax in one call
+            action = ts_choose(self.alpha[context], self.beta[context])
+            logger.debug("TS-sample: chosen action %s", action)
         else:
             # Thompson Sampling
-            samples = [
-                beta.rvs(self.alpha[context][a], self.beta[context][a])
-                for a in (0, 1)
-            ]
+            samples = [self._draw(context, 0), self._draw(context, 1)]
             action = 0 if samples[0] >= samples[1] else 1
-            print(f"TS-sample: θ_samples={samples}, chosen action {action}")
+            logger.debug("TS-sample: θ_samples=%s, chosen action %s", samples, action)
 
         # memorize for update()
         self._last_context = context
         self._last_action  = action
         return action
 
+    def _draw(self, c: int, a: int) -> float:
+        """
+        Next θ ~ Beta(α[c, a], β[c, a]) from the buffer, refilling it when exhausted.
+        """
+        pos = self._pos[c, a]
+        if pos >= self.SAMPLE_BUFFER:
+            self._samples[c, a] = self._rng.beta(self.alpha[c, a], self.beta[c, a], size=self.SAMPLE_BUFFER)
+            pos = 0
+        self._pos[c, a] = pos + 1
+        return float(self._samples[c, a, pos])
+
     def update(self, reward: float):
         """
         Update the posterior for the last-chosen (context, action)
         using the provided reward ∈ [0,1].
         """
-        print('updating with reward:', reward)
+        logger.debug("updating with reward: %s", reward)
         if self._last_context is None or self._last_action is None:
-            print("No previous select() call—skipping update")
+            logger.debug("No previous select() call—skipping update")
             return
 
         c = self._last_context
         a = self._last_action
 
         # Bayesian update: treat reward as fractional “success”
-        self.alpha[c][a] += reward
-        self.beta[c][a]  += (1.0 - reward)
+        self.alpha[c, a] += reward
+        self.beta[c, a]  += (1.0 - reward)
+        # the posterior changed, its pre-drawn samples are stale
+        self._pos[c, a] = self.SAMPLE_BUFFER
 
         # clear last choice
         self._last_context = None
         self._last_action  = None
 
-        print('updated alpha:', self.alpha)
-        print('updated beta:', self.beta)
-        print("done updating")
-
-    @staticmethod
-    def reward(cur_perf: float, best_perf: float, n_calls: int, scale: float = 500.0) -> float:
-        """
-        Sigmoidal reward based on per-step improvement.
-        """
-        print("calculating reward")
-        print("cur_perf:", cur_perf)
-        print("best_perf:", best_perf)
-        print("n_calls:", n_calls)
-        try:
-            improvement_ratio = (cur_perf - best_perf) / best_perf
-        except ZeroDivisionError:
-            improvement_ratio = 1.0
-        print("improvement_ratio:", improvement_ratio)
-        improvement_per_step = improvement_ratio / n_calls
-        # steep sigmoid centered at 0.1% per call
-        reward_val = 1.0 / (1.0 + math.exp(-scale * (improvement_per_step - 0.001)))
-        print("reward:", reward_val)
-        return reward_val
+        logger.debug("updated alpha: %s", self.alpha)
+        logger.debug("updated beta: %s", self.beta)
+        logger.debug("done updating")
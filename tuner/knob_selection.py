@@ -13,9 +13,13 @@
 """
 
 import math
+from functools import lru_cache
+from itertools import compress, islice
 import numpy as np
 import random
-from scipy.stats import ttest_ind
+from scipy.special import stdtr
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from typing import List
 
 class IncrementalSupportMask:
@@ -23,88 +27,169 @@ class IncrementalSupportMask:
         self.n_features = n_features
         self.step = step
         self.selected = initial - step  # so first call bumps to `initial`
+        self._idx = np.arange(n_features)
+        # once `selected` reaches n_features every call returns the same mask, reuse it
+        self._mask_for = lru_cache(maxsize=None)(self._build_mask)
 
-    def __call__(self) -> List[bool]:
-        self.selected = min(self.selected + self.step, self.n_features)
-        mask = [i < self.selected for i in range(self.n_features)]
+    def _build_mask(self, selected: int) -> np.ndarray:
+        mask = self._idx < selected
+        mask.setflags(write=False)  # shared between calls
         return mask
 
+    def __call__(self) -> np.ndarray:
+        self.selected = min(self.selected + self.step, self.n_features)
+        return self._mask_for(self.selected)
+
+class HistGBImportanceRegressor(HistGradientBoostingRegressor):
+    """
+    HistGradientBoostingRegressor with the feature_importances_ attribute RFECV needs:
+    the permutation importance of each feature on the training data (negative values
+    clipped to 0), computed through the public sklearn.inspection API after each fit.
+    """
+    def fit(self, X, y, sample_weight=None):
+        super().fit(X, y, sample_weight=sample_weight)
+        result = permutation_importance(self, X, y, n_repeats=5, random_state=self.random_state)
+        self.feature_importances_ = np.clip(result.importances_mean, 0.0, None)
+        return self
+
+def _welch_stats(Y, mask):
+    """
+    Per-column size, mean and unbiased variance of Y restricted to each column of `mask`.
+    """
+    n = mask.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (mask * Y[:, None]).sum(axis=0) / n
+        var = (mask * (Y[:, None] - mean) ** 2).sum(axis=0) / (n - 1)
+    return n, mean, var
+
 def eliminate_with_scipy_ttest(X, Y, alpha: float) -> List[bool]:
-    X = np.asarray(X); Y = np.asarray(Y)
-    n_samples, n_features = X.shape
-    support_mask: List[bool] = []
-    for k in range(n_features):
-        vals = X[:, k]
-        med = np.median(vals)
-        low_mask = vals <= med
-        Y_low, Y_high = Y[low_mask], Y[~low_mask]
-        if Y_low.size < 2 or Y_high.size < 2:
-            support_mask.append(True)
-            continue
-        _, p_value = ttest_ind(Y_low, Y_high, equal_var=False)
-        support_mask.append(p_value <= alpha)
-    return support_mask
+    """
+    Keep feature k if Y differs significantly (Welch's t-test, p <= alpha) between the
+    samples at or below the median of X[:, k] and those above it.
+    All features are tested at once with one vectorized Welch t-test.
+    """
+    X = np.asarray(X, dtype=np.float64); Y = np.asarray(Y, dtype=np.float64)
+    low_mask = X <= np.median(X, axis=0)
+    n_low, mean_low, var_low = _welch_stats(Y, low_mask)
+    n_high, mean_high, var_high = _welch_stats(Y, ~low_mask)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        se_low, se_high = var_low / n_low, var_high / n_high
+        t_stat = (mean_low - mean_high) / np.sqrt(se_low + se_high)
+        # Welch–Satterthwaite degrees of freedom
+        df = (se_low + se_high) ** 2 / (se_low ** 2 / (n_low - 1) + se_high ** 2 / (n_high - 1))
+    # stdtr needs df > 0; like scipy, use 1 where df is undefined (NaN) or not positive
+    df = np.where(df > 0, df, 1.0)
+    p_value = 2.0 * stdtr(df, -np.abs(t_stat))
+
+    # Too few samples on either side to test: keep the feature
+    too_small = (n_low < 2) | (n_high < 2)
+    return (too_small | (p_value <= alpha)).tolist()
 
 def update_tuned_knobs(current_tuned_list, full_knob_dict, selection_mask,
-                       frozen_values, is_random=False, is_incremental=0, is_SE=0,is_bandit=0, is_TS= 0, is_LRT=0, is_pure_incremental=0, bandit_choice=0):
+                       frozen_values, is_random=False, is_incremental=0, is_SE=0,is_bandit=0, is_TS= 0, is_LRT=0, is_pure_incremental=0, bandit_choice=0,
+                       used=None):
+    # used: knobs already tuned or frozen; when given (see KnobSelector) it is updated in place
     current = list(current_tuned_list)
-    used = set(current).union(frozen_values.keys())
+    if used is None:
+        used = set(current).union(frozen_values.keys())
     keys = list(full_knob_dict.keys())
     updated = False
     element_to_tune = len(current)
+    # number of selected knobs and mask length, computed once; the mask may be a list or a bool array
+    selection_mask = np.asarray(selection_mask, dtype=bool)
+    n_true = int(selection_mask.sum())
+    n_mask = len(selection_mask)
 
-    if element_to_tune > selection_mask.count(True):
+    if element_to_tune > n_true:
         updated = True
 
     if is_incremental == 1 or is_SE == 1:
-        print(f"Change search space from {element_to_tune} to {selection_mask.count(True)}")
-        element_to_tune = selection_mask.count(True)
+        print(f"Change search space from {element_to_tune} to {n_true}")
+        element_to_tune = n_true
     elif is_bandit == 1:
-        if selection_mask.count(True) == len(selection_mask):
+        if n_true == n_mask:
             print(f"All knobs are important, bandit choice {bandit_choice}, change search space from {element_to_tune} to {element_to_tune + math.floor(bandit_choice * 5)}")
         else:
-            print(f"Not all knobs are important, useful knobs length is {selection_mask.count(True) } ,bandit choice {bandit_choice}, change search space from {element_to_tune} to {selection_mask.count(True) + math.floor(bandit_choice * 5)}")
-        element_to_tune = selection_mask.count(True) + 5 * bandit_choice
+            print(f"Not all knobs are important, useful knobs length is {n_true } ,bandit choice {bandit_choice}, change search space from {element_to_tune} to {n_true + math.floor(bandit_choice * 5)}")
+        element_to_tune = n_true + 5 * bandit_choice
     elif is_TS == 1 or is_LRT == 1: # well they share the same logic
-        new_element_to_tune = selection_mask.count(True) +  5 * bandit_choice
-        if selection_mask.count(True) == len(selection_mask):
-            print(f"All knobs are important, bandit choice {bandit_choice}, change search space from {len(selection_mask)} to {new_element_to_tune}")
+        new_element_to_tune = n_true +  5 * bandit_choice
+        if n_true == n_mask:
+            print(f"All knobs are important, bandit choice {bandit_choice}, change search space from {n_mask} to {new_element_to_tune}")
         else:
-            print(f"Not all knobs are important, useful knobs length is {selection_mask.count(True) } ,bandit choice {bandit_choice}, change search space from {element_to_tune} to {new_element_to_tune}")
+            print(f"Not all knobs are important, useful knobs length is {n_true } ,bandit choice {bandit_choice}, change search space from {element_to_tune} to {new_element_to_tune}")
         element_to_tune = new_element_to_tune
     elif is_pure_incremental: # well they share the same logic
-        new_element_to_tune = selection_mask.count(True) +  5 
+        new_element_to_tune = n_true +  5 
         print(f"Pure incremental")
         print(f"Change search space from {element_to_tune} to {new_element_to_tune}")
         element_to_tune = new_element_to_tune   
     else:
-        if selection_mask.count(True) == len(selection_mask):
+        if n_true == n_mask:
             print(f"All knobs are important, enlarge search space from {element_to_tune} to {math.floor(element_to_tune * 1.5)}")
             element_to_tune = math.floor(element_to_tune * 1.5)
         else:
-            print(f"Not all knobs are important, reduce search space from {element_to_tune} to {selection_mask.count(True)}, but add one for exploration {selection_mask.count(True) + 1}")
-            element_to_tune = selection_mask.count(True) + 1
+            print(f"Not all knobs are important, reduce search space from {element_to_tune} to {n_true}, but add one for exploration {n_true + 1}")
+            element_to_tune = n_true + 1
 
-    new_list = [k for i, k in enumerate(current) if selection_mask[i] and i < len(current)]
+    # keep the current knobs the mask selected (at C speed); extra mask entries are ignored
+    new_list = list(compress(current, selection_mask[:len(current)]))
 
     if is_random:
-        while len(new_list) < element_to_tune:
-            if len(used) == len(keys):
-                break
-            for c in random.sample(keys, len(keys)):
-                if c not in used:
-                    new_list.append(c)
-                    used.add(c)
-                    updated = True
-                    break
-    else:
         needed = element_to_tune - len(new_list)
         if needed > 0:
+            # one shuffle of the unused keys instead of one full shuffle per added knob
             available = [k for k in keys if k not in used]
+            random.shuffle(available)
             to_add = available[:needed]
             new_list.extend(to_add)
             used.update(to_add)
+            if to_add:
+                updated = True
+    else:
+        needed = element_to_tune - len(new_list)
+        if needed > 0:
+            # first `needed` unused keys, in order, without building the full list
+            to_add = list(islice((k for k in keys if k not in used), needed))
+            new_list.extend(to_add)
+            used.update(to_add)
             updated = bool(to_add)
 
     print("updated is: ", updated)
     return new_list, updated
+
+
+class KnobSelector:
+    """
+    update_tuned_knobs for one tuning run, keeping the set of used (tuned or frozen) knobs
+    between calls instead of rebuilding it each time.
+    """
+    def __init__(self, full_knob_dict):
+        self.full_knob_dict = full_knob_dict
+        self._current_set = frozenset()
+        self._frozen_set = frozenset()
+        self._used = set()
+
+    def _sync_used(self, current_tuned_list, frozen_values):
+        current_set = frozenset(current_tuned_list)
+        # frozen_values only ever gains knobs, a new size means a new snapshot
+        frozen_set = self._frozen_set
+        if len(frozen_values) != len(frozen_set):
+            frozen_set = frozenset(frozen_values)
+        # only knobs that moved in or out of current/frozen since the last call are touched
+        for k in (self._current_set ^ current_set) | (self._frozen_set ^ frozen_set):
+            if k in current_set or k in frozen_set:
+                self._used.add(k)
+            else:
+                self._used.discard(k)
+        self._current_set = current_set
+        self._frozen_set = frozen_set
+
+    def __call__(self, current_tuned_list, selection_mask, frozen_values, **kwargs):
+        """
+        Same as update_tuned_knobs(current_tuned_list, full_knob_dict, selection_mask, frozen_values, **kwargs).
+        """
+        self._sync_used(current_tuned_list, frozen_values)
+        return update_tuned_knobs(current_tuned_list, self.full_knob_dict, selection_mask,
+                                  frozen_values, used=self._used, **kwargs)
@@ -15,43 +15,59 @@
 #!/usr/bin/env python3
 import os
 import sys
+import logging
 import time
 import random
 import math
 import numpy as np
 
-from functools import partial
+from contextlib import nullcontext
+from functools import lru_cache, partial
+from joblib import parallel_backend
 from datetime import datetime
+from scipy.optimize import OptimizeResult
 from skopt import gp_minimize
+from skopt.learning import GaussianProcessRegressor
+from skopt.learning.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
 
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import KFold
 from sklearn.feature_selection import RFECV
+from sklearn.utils import resample
 
 from  config import parse_arguments
 from  utils import (
     load_config,
     get_knob_dicts,
-    load_intermediate_data,
-    load_y_data,
+    TrialStore,
     build_search_space,
     get_combined_config,
+    knob_layout,
 )
 from knob_selection import (
+    HistGBImportanceRegressor,
     IncrementalSupportMask,
+    KnobSelector,
     eliminate_with_scipy_ttest,
-    update_tuned_knobs,
 )
 from  callbacks import LoggingCallback
-from  objective import objective_func
+from  objective import objective_func, untuned_knob_defaults
 from  contextualTS import ContextualTS
 from  TwoActionTS import TwoActionTS
 from  TwoActionLRT import TwoActionLRT
 # sys.path.append("/home/cloud/dot/Drivers")
 from MySQLDriver import MySQLDriver
-from Normalizer import Normalizer
+from Normalizer import make_normalizer
 # from ContextualTS import ContextualTS
 
+logger = logging.getLogger(__name__)
+# Loggers of the tuner modules (named after the modules, as imported from tuner/)
+PROJECT_LOGGERS = (
+    "__main__", "objective", "utils", "knob_selection",
+    "TwoActionTS", "contextualTS", "TwoActionLRT", "_bandit_base",
+)
+
+
 def setup_driver_and_dirs(config_path, config_data, args):
     cfg_name = os.path.splitext(os.path.basename(config_path))[0]
 
@@ -72,6 +88,7 @@ def setup_driver_and_dirs(config_path, config_data, args):
         is_limited_cpu=config_data.get("is_limited_cpu", 0),
         objective_metric=config_data.get("objective_metric", "trx"),
         budget_allocator=config_data.get("budget_allocator", 0),
+        olap_workers=config_data.get("olap_workers", 1),
     )
     if args.debug:
         driver.debug = True
@@ -121,10 +138,82 @@ def decide_calls(x0, updated_knobs_num, len_knobs, flags, remaining_iters):
     return initial_pts, min(n_calls, remaining_iters)
 
 
+def build_warm_gp(current_knobs, warm_kernel, random_state):
+    """
+    GP surrogate (same as skopt's default for gp_minimize) whose kernel hyperparameters
+    start from the ones fitted in earlier rounds: knobs tuned before keep their length
+    scale, new knobs start at 1.0. Returns None (skopt default GP) before any fit.
+    """
+    if not warm_kernel:
+        return None
+    n_dims = len(current_knobs)
+    length_scale = np.clip([warm_kernel["length_scale"].get(k, 1.0) for k in current_knobs], 0.01, 100)
+    # fitted values can sit a rounding error outside their bounds, clip them back in
+    amplitude = float(np.clip(warm_kernel["amplitude"], 0.01, 1000.0))
+    noise = float(np.clip(warm_kernel["noise"], 1e-5, 1e5))
+    kernel = ConstantKernel(amplitude, (0.01, 1000.0)) * Matern(
+        length_scale=length_scale,
+        length_scale_bounds=[(0.01, 100)] * n_dims,
+        nu=2.5,
+    ) + WhiteKernel(noise_level=noise)
+    return GaussianProcessRegressor(
+        kernel=kernel,
+        normalize_y=True,
+        noise="gaussian",
+        # the warm start replaces most of the random restarts
+        n_restarts_optimizer=1,
+        random_state=random_state,
+    )
+
+
+def save_warm_kernel(result, current_knobs, warm_kernel):
+    """
+    Store the kernel hyperparameters of the last fitted surrogate in warm_kernel, length
+    scales per knob name so they carry over when the tuned knob set changes.
+    """
+    if not result.models:
+        return
+    model = result.models[-1]
+    # kernel_ = ConstantKernel * Matern + WhiteKernel (noise zeroed after fit, kept in noise_)
+    product = model.kernel_.k1
+    length_scale = np.broadcast_to(product.k2.length_scale, (len(current_knobs),))
+    warm_kernel["amplitude"] = float(product.k1.constant_value)
+    warm_kernel.setdefault("length_scale", {}).update(zip(current_knobs, length_scale.tolist()))
+    warm_kernel["noise"] = float(model.noise_) if model.noise_ else 1.0
+
+
+# Above this many tuned knobs the acquisition function is optimized by sampling only
+SAMPLING_ACQ_MIN_KNOBS = 15
+
+
+def simulate_optimization(x0, y0, n_calls, n_dims, callback):
+    """
+    Debug-mode stand-in for gp_minimize: n_calls random points with simulated TPS (as
+    objective_func returns in debug mode), drawn in one batch. The callback still sees one
+    call per point, and the result has the x_iters/func_vals/models fields used here.
+    """
+    new_x = np.random.uniform(size=(n_calls, n_dims)).tolist()
+    new_y = (-np.random.uniform(1000, 2000, size=n_calls)).tolist()
+
+    # x0/y0 are ndarrays from the second round on, so no truth-value test on them
+    result = OptimizeResult(
+        x_iters=list(x0) if x0 is not None else [],
+        func_vals=list(y0) if y0 is not None else [],
+        models=[],
+    )
+    for x, y in zip(new_x, new_y):
+        result.x_iters.append(x)
+        result.func_vals.append(y)
+        callback(result)
+    result.func_vals = np.array(result.func_vals)
+    return result
+
+
 def run_optimization_iteration(
     driver, normalizer, full_knob_dict, frozen_values,
     current_knobs, benchmark, x0, y0,
-    initial_pts, n_calls, random_state, models_dir, cfg_name, intermediate_csv, debug=False
+    initial_pts, n_calls, random_state, models_dir, cfg_name, intermediate_csv, debug=False,
+    n_jobs=1, warm_kernel=None, objective_cache=None
 ):
     callback = LoggingCallback(
         normalizer=normalizer,
@@ -145,67 +234,128 @@ def run_optimization_iteration(
         frozen_values=frozen_values,
         benchmark=benchmark,
         intermediate_csv=intermediate_csv,
+        untuned_defaults=untuned_knob_defaults(full_knob_dict, normalizer),
+        cache_path=objective_cache,
     )
-    if not debug:
-        result = gp_minimize(
-            func=objective,
-            dimensions=build_search_space(current_knobs),
-            x0=x0,
-            y0=y0,
-            n_initial_points=initial_pts,
-            n_calls=n_calls,
-            random_state=random_state,
-            verbose=False,
-            callback=[callback],
-            # initial_point_generator="lhs",
-            # getattr(driver, "debug", False)
-        )
-    else:
-        print("debug mode, ultra quick bo optimization")
-        result = gp_minimize(
-            func=objective,
-            dimensions=build_search_space(current_knobs),
-            x0=x0,
-            y0=y0,
-            n_initial_points=initial_pts,
-            n_calls=n_calls,
-            random_state=random_state,
-            verbose=False,
-            callback=[callback],
-            acq_optimizer="sampling",
-            acq_func="EI",
-            n_points=5,
-            # initial_point_generator="lhs",
-            # getattr(driver, "debug", False)
-        )
+    # n_jobs != 1 (config bayes_opt_settings.n_jobs): the acquisition optimizer restarts
+    # run in parallel on a loky worker pool; -1 uses every core
+    backend = parallel_backend("loky", n_jobs=n_jobs) if n_jobs != 1 else nullcontext()
+    # surrogate warm-started from the previous rounds, None for skopt's default GP
+    base_estimator = build_warm_gp(current_knobs, warm_kernel, random_state)
+    try:
+        if debug:
+            logger.debug("debug mode, simulated optimization without gp_minimize")
+            result = simulate_optimization(x0, y0, n_calls, len(current_knobs), callback)
+        else:
+            if len(current_knobs) > SAMPLING_ACQ_MIN_KNOBS:
+                # many knobs: L-BFGS restarts on the acquisition cost more than they gain,
+                # evaluate it on random points only
+                acq_kwargs = {"acq_optimizer": "sampling", "n_points": max(500, 50 * len(current_knobs))}
+            else:
+                acq_kwargs = {"acq_optimizer": "lbfgs", "n_restarts_optimizer": 5}
+            with backend:
+                result = gp_minimize(
+                    func=objective,
+                    dimensions=build_search_space(current_knobs),
+                    base_estimator=base_estimator,
+                    x0=x0,
+                    y0=y0,
+                    n_initial_points=initial_pts,
+                    n_calls=n_calls,
+                    random_state=random_state,
+                    verbose=False,
+                    callback=[callback],
+                    n_jobs=n_jobs,
+                    **acq_kwargs,
+                    # initial_point_generator="lhs",
+                    # getattr(driver, "debug", False)
+                )
+    finally:
+        callback.close()
+
+    if warm_kernel is not None:
+        save_warm_kernel(result, current_knobs, warm_kernel)
 
     return result.x_iters, result.func_vals
 
 
+RFECV_SPLITS = 5
+# Smaller histories use fewer CV folds; larger ones are subsampled, the knob ranking
+# does not need every trial
+RFECV_SMALL_SAMPLES = 60
+RFECV_SMALL_SPLITS = 3
+RFECV_MAX_SAMPLES = 150
+
+
+def _rfecv_is_pointless(X_all, y_all, current_knobs):
+    """
+    True when RFECV cannot say anything useful: too few samples for the CV folds,
+    too few knobs to eliminate, or a flat objective.
+    """
+    return len(X_all) < 2 * RFECV_SPLITS or len(current_knobs) <= 2 or np.std(y_all) < 1e-9
+
+
+def _run_rfecv(X_all, y_all, current_knobs, min_features_to_select=1, max_trees=300, estimator="rf"):
+    """
+    RFECV with a random forest sized on the number of tuned knobs (at most max_trees trees,
+    config rfecv_max_trees); returns the support mask. The CV folds are fitted in parallel.
+    estimator="hgb" (config rfecv_estimator) ranks the knobs with a histogram gradient
+    boosting model instead, cheaper to fit than the forest.
+    At most RFECV_MAX_SAMPLES trials (a fixed random subsample) are used, with
+    RFECV_SMALL_SPLITS folds below RFECV_SMALL_SAMPLES trials.
+    When RFECV is pointless (see _rfecv_is_pointless) nothing is fitted and every knob is kept.
+    """
+    if _rfecv_is_pointless(X_all, y_all, current_knobs):
+        print(f"Skipping RFECV ({len(X_all)} samples, {len(current_knobs)} knobs), keeping all knobs")
+        return [True] * len(current_knobs)
+    if estimator == "hgb":
+        rf = HistGBImportanceRegressor(max_iter=200, learning_rate=0.05, max_depth=None, random_state=42)
+    else:
+        n_estimators = min(100 + 10 * len(current_knobs), max_trees)
+        rf = RandomForestRegressor(n_estimators=n_estimators, max_depth=None, random_state=42, n_jobs=-1)
+    if len(X_all) > RFECV_MAX_SAMPLES:
+        X_all, y_all = resample(X_all, y_all, replace=False, n_samples=RFECV_MAX_SAMPLES, random_state=42)
+    n_splits = RFECV_SMALL_SPLITS if len(X_all) < RFECV_SMALL_SAMPLES else RFECV_SPLITS
+    cv = KFold(n_splits=n_splits, shuffle=True, random_state=42)
+    # rfecv = RFECV(estimator=rf, step=1, cv=cv, scoring="r2")
+    rfecv = RFECV(estimator=rf, step=1, cv=cv, scoring="neg_mean_squared_error",
+                  min_features_to_select=min_features_to_select, n_jobs=-1)
+    rfecv.fit(X_all, y_all)
+
+    logger.debug("Optimal number of features: %s", rfecv.n_features_)
+    logger.debug("Selected features mask: %s", rfecv.support_)
+    logger.debug("Feature ranking: %s", rfecv.ranking_)
+
+    return rfecv.support_.tolist()
+
+
 def feature_selection_cycle(
     X_all, y_all, current_knobs, full_knob_dict, frozen_values,
-    flags, selector, is_random, intermediate_csv, bandit=None, n_calls=None
+    flags, selector, is_random, intermediate_csv, bandit=None, n_calls=None, knob_selector=None,
+    store=None, rfecv_max_trees=300, get_normalizer=None, layout=None, rfecv_estimator="rf"
 ):
     # if len(X_all[0]) <= 2:
     #     return current_knobs, 0, X_all, y_all
     is_basic, is_low, is_SE, is_incremental, is_bandit, is_TS, is_LRT, is_super_low, is_pure_incremental = flags
     bandit_choice = -1
-    # RFECV branch
-    if not is_SE and not is_incremental and not is_bandit and not is_TS and not is_LRT and not is_pure_incremental:
-        n_estimators = 100 + 10 * len(current_knobs)
-        rf = RandomForestRegressor(n_estimators=n_estimators, max_depth=None, random_state=42, n_jobs=-1)
-        cv = KFold(n_splits=5, shuffle=True, random_state=42)
-        rfecv = RFECV(estimator=rf, step=1, cv=cv, scoring="neg_mean_squared_error")
-        rfecv.fit(X_all, y_all)
-
-        print("Optimal number of features:", rfecv.n_features_)
-        print("Selected features mask:", rfecv.support_)
-        print("Feature ranking:", rfecv.ranking_)
-
-        mask = rfecv.support_.tolist()
+    if store is None:
+        store = TrialStore(intermediate_csv)
+    if get_normalizer is None:
+        get_normalizer = lambda knobs: make_normalizer({k: full_knob_dict[k] for k in knobs})
+    # best trial so far (X_all holds every trial of the run), computed once for the knob
+    # update below and for the caller; best_idx indexes X_all / y_all
+    best_idx = int(np.argmin(y_all))
+    best_cfg = get_combined_config(get_normalizer(tuple(current_knobs)), full_knob_dict, frozen_values,
+                                   X_all[best_idx], layout)
+    # Every method except incremental and SE ranks the knobs with the same RFECV; fit it once
+    # here, the branches below only differ in how they use the mask. When RFECV is pointless
+    # it keeps every knob and the knob update below still runs, so small knob sets can grow
+    min_features_to_select = 10 if is_super_low and (is_TS or is_LRT or is_pure_incremental) else 1
+    if not is_incremental and not is_SE:
+        mask = _run_rfecv(X_all, y_all, current_knobs, min_features_to_select, rfecv_max_trees, rfecv_estimator)
 
     # Incremental‐mask branch
-    elif is_incremental:
+    if is_incremental:
         mask = selector()
 
     # Sign‐test branch
@@ -213,85 +363,27 @@ def feature_selection_cycle(
         mask = eliminate_with_scipy_ttest(X_all, y_all, alpha=0.05)
 
     elif is_bandit:
-        print("enter the contextual TS bandit branch")
-        
-        n_estimators = 100 + 10 * len(current_knobs)
-        rf = RandomForestRegressor(n_estimators=n_estimators, max_depth=None, random_state=42, n_jobs=-1)
-        cv = KFold(n_splits=5, shuffle=True, random_state=42)
-        rfecv = RFECV(estimator=rf, step=1, cv=cv, scoring="neg_mean_squared_error")
-        rfecv.fit(X_all, y_all)
-
-        print("Optimal number of features:", rfecv.n_features_)
-        print("Selected features mask:", rfecv.support_)
-        print("Feature ranking:", rfecv.ranking_)
-
-        mask = rfecv.support_.tolist()
-        
+        logger.debug("enter the contextual TS bandit branch")
         context = 1 if all(mask) else 0 # contextual bandit
-        perf_list = load_y_data(
-            intermediate_csv
-        )
-        # print("in main, the perf_list is ", perf_list)
-        # print("in main, the perf_list length is ", len(perf_list))
-        # print("max(perf_list[-n_calls:] is", max(perf_list[-n_calls:]))
-        # print("max(perf_list[:len(perf_list)-n_calls])) is ", max(perf_list[:len(perf_list)-n_calls]))
-        cur_perf =  max(perf_list[-n_calls:])
-        best_perf =  max(perf_list[:len(perf_list)-n_calls]) if perf_list[:len(perf_list)-n_calls] else 0
+        cur_perf, best_perf = store.perf_maxes(n_calls)
         bandit.update(bandit.reward(cur_perf,best_perf, n_calls))
-        print("call bandit select")
+        logger.debug("call bandit select")
         bandit_choice = bandit.select(context)
     elif is_TS or is_LRT:
-        print("enter the normal TS bandit branch or LRT branch")
-        min_features_to_select = 10 if  is_super_low else 1
-        
-        n_estimators = 100 + 10 * len(current_knobs)
-        rf = RandomForestRegressor(n_estimators=n_estimators, max_depth=None, random_state=42, n_jobs=-1)
-        cv = KFold(n_splits=5, shuffle=True, random_state=42)
-        # rfecv = RFECV(estimator=rf, step=1, cv=cv, scoring="r2")
-        rfecv = RFECV(estimator=rf, step=1, cv=cv, scoring="neg_mean_squared_error", min_features_to_select = min_features_to_select)
-        rfecv.fit(X_all, y_all)
-
-        print("Optimal number of features:", rfecv.n_features_)
-        print("Selected features mask:", rfecv.support_)
-        print("Feature ranking:", rfecv.ranking_)
-
-        mask = rfecv.support_.tolist()
-        
-        perf_list = load_y_data(
-            intermediate_csv
-        )
-
-        cur_perf =  max(perf_list[-n_calls:])
-        best_perf =  max(perf_list[:len(perf_list)-n_calls]) if perf_list[:len(perf_list)-n_calls] else 0
+        logger.debug("enter the normal TS bandit branch or LRT branch")
+        cur_perf, best_perf = store.perf_maxes(n_calls)
         bandit.update(bandit.reward(cur_perf,best_perf, n_calls))
-        print("call bandit select")
+        logger.debug("call bandit select")
         bandit_choice = bandit.select()
     elif is_pure_incremental:
-        print("pure incremental feature selection")
-        min_features_to_select = 10 if  is_super_low else 1
-        
-        n_estimators = 100 + 10 * len(current_knobs)
-        rf = RandomForestRegressor(n_estimators=n_estimators, max_depth=None, random_state=42, n_jobs=-1)
-        cv = KFold(n_splits=5, shuffle=True, random_state=42)
-        # rfecv = RFECV(estimator=rf, step=1, cv=cv, scoring="r2")
-        rfecv = RFECV(estimator=rf, step=1, cv=cv, scoring="neg_mean_squared_error", min_features_to_select = min_features_to_select)
-        rfecv.fit(X_all, y_all)
-
-        print("Optimal number of features:", rfecv.n_features_)
-        print("Selected features mask:", rfecv.support_)
-        print("Feature ranking:", rfecv.ranking_)
+        logger.debug("pure incremental feature selection")
         bandit_choice = 0
-        mask = rfecv.support_.tolist()
-        
-    else:
-        print("Error: No feature selection method selected.")
-        sys.exit(1)
 
-
-    print("min_features_to_select is ", min_features_to_select)
-    new_knobs, updated = update_tuned_knobs(
+    logger.debug("min_features_to_select is %s", min_features_to_select)
+    if knob_selector is None:
+        knob_selector = KnobSelector(full_knob_dict)
+    new_knobs, updated = knob_selector(
         current_knobs,
-        full_knob_dict,
         mask,
         frozen_values,
         is_random=is_random,
@@ -311,10 +403,6 @@ def feature_selection_cycle(
         print("  Old tuned knobs:", current_knobs)
         print("  New tuned knobs:", new_knobs)
 
-        best_idx = np.argmin(y_all)
-        normalizer = Normalizer({k: full_knob_dict[k] for k in current_knobs})
-        best_cfg = get_combined_config(normalizer, full_knob_dict, frozen_values, X_all[best_idx])
-
         for k in current_knobs:
             if k not in new_knobs:
                 frozen_values[k] = best_cfg[k]
@@ -323,18 +411,22 @@ def feature_selection_cycle(
         updated_num = max(len(set(new_knobs) - set(current_knobs)),0)
         print("update tuned knobs num ", updated_num)
 
-        new_x0, new_y0 = load_intermediate_data(
-            intermediate_csv,
+        new_x0, new_y0 = store.x_for(
             new_knobs,
-            Normalizer({k: full_knob_dict[k] for k in new_knobs})
+            get_normalizer(tuple(new_knobs))
         )
-        return new_knobs, updated_num, new_x0, new_y0
+        return new_knobs, updated_num, new_x0, new_y0, best_idx, best_cfg
 
-    return current_knobs, 0, X_all, y_all
+    return current_knobs, 0, X_all, y_all, best_idx, best_cfg
 
 
 def main():
     args = parse_arguments()
+    # third-party libraries (paramiko, mysql.connector, joblib...) log warnings only; the
+    # tuner's own modules log INFO and above, plus the per-round DEBUG trace with --debug
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    for name in PROJECT_LOGGERS:
+        logging.getLogger(name).setLevel(logging.DEBUG if args.debug else logging.INFO)
     config_data = load_config(args.config_path)
 
     full_knob_dict, _, tuned_keys = get_knob_dicts(
@@ -343,12 +435,24 @@ def main():
         is_random=config_data.get("is_random", 0),
     )
 
+    # Normalizer per tuned knob subset; the key keeps the knob order, it is the column order
+    @lru_cache(maxsize=64)
+    def get_normalizer(knob_tuple):
+        return make_normalizer({k: full_knob_dict[k] for k in knob_tuple})
+    # column layout of full_knob_dict for get_combined_config
+    layout = knob_layout(full_knob_dict)
+
     driver, cfg_name, intermediate_csv = setup_driver_and_dirs(
         args.config_path, config_data, args
     )
 
+    # results of already benchmarked configurations, kept next to the intermediate CSV
+    objective_cache = os.path.splitext(intermediate_csv)[0] + ".cache.json" if config_data.get("objective_cache", 0) else None
+
     total_iterations = config_data.get("bayes_opt_settings", {}).get("n_calls", 30)
     random_state    = config_data.get("bayes_opt_settings", {}).get("random_state", 0)
+    # cores for the acquisition optimizer, -1 = all of them
+    bo_n_jobs       = config_data.get("bayes_opt_settings", {}).get("n_jobs", 1)
     flags = (
         config_data.get("is_basic", 0),
         config_data.get("is_low", 0),
@@ -365,13 +469,16 @@ def main():
     selector = None
     if flags[3] and not flags[2]:
         selector = IncrementalSupportMask(n_features=len(full_knob_dict), step=2, initial=4)
+    # keeps the set of tuned/frozen knobs across feature-selection cycles
+    knob_selector = KnobSelector(full_knob_dict)
 
+    # in-memory copy of intermediate_csv, re-read only past what was already parsed
+    store = TrialStore(intermediate_csv)
     if os.path.exists(intermediate_csv) and os.path.getsize(intermediate_csv) > 0:
         try:
-            x0, y0 = load_intermediate_data(
-                intermediate_csv,
+            x0, y0 = store.x_for(
                 tuned_keys,
-                Normalizer({k: full_knob_dict[k] for k in tuned_keys})
+                get_normalizer(tuple(tuned_keys))
             )
             if not x0 or not y0:
                 x0, y0 = None, None
@@ -395,6 +502,8 @@ def main():
         bandit = TwoActionLRT()
 
     overall_iters = 0
+    # GP kernel hyperparameters carried from one BO round to the next
+    warm_kernel = {}
     current_knobs = tuned_keys
     frozen_values = {}
     best_result = None
@@ -411,7 +520,7 @@ def main():
 
         X_all, y_all = run_optimization_iteration(
             driver=driver,
-            normalizer=Normalizer({k: full_knob_dict[k] for k in current_knobs}),
+            normalizer=get_normalizer(tuple(current_knobs)),
             full_knob_dict=full_knob_dict,
             frozen_values=frozen_values,
             current_knobs=current_knobs,
@@ -425,11 +534,14 @@ def main():
             cfg_name=cfg_name,
             intermediate_csv=intermediate_csv,
             debug = getattr(driver, "debug", False),
+            n_jobs = bo_n_jobs,
+            warm_kernel = warm_kernel,
+            objective_cache = objective_cache,
         )
 
         overall_iters += n_calls
 
-        current_knobs, updated_knobs_num, x0, y0 = feature_selection_cycle(
+        current_knobs, updated_knobs_num, x0, y0, best_idx, best_cfg = feature_selection_cycle(
             X_all, y_all,
             current_knobs,
             full_knob_dict,
@@ -440,19 +552,17 @@ def main():
             intermediate_csv,       # ← now passed here
             bandit =  bandit if bandit else None,
             n_calls = n_calls,
+            knob_selector = knob_selector,
+            store = store,
+            rfecv_max_trees = config_data.get("rfecv_max_trees", 300),
+            get_normalizer = get_normalizer,
+            layout = layout,
+            rfecv_estimator = config_data.get("rfecv_estimator", "rf"),
         )
-        best_idx = np.argmin(y0)
-        best_tps = -y0[best_idx]
+        # best_idx indexes this round's y_all, which covers every trial so far
+        best_tps = -y_all[best_idx]
         print(f"\n=== Best TPS so far: {best_tps:.2f} ")
-        best_result = (
-            best_tps,
-            get_combined_config(
-                Normalizer({k: full_knob_dict[k] for k in current_knobs}),
-                full_knob_dict,
-                frozen_values,
-                x0[best_idx],
-            ),
-        )
+        best_result = (best_tps, best_cfg)
 
     if best_result:
         best_tps, best_cfg = best_result
@@ -465,6 +575,8 @@ def main():
         config_json = str(best_cfg).replace("'", '"')
         print("TUNING DONE")
 
+    driver.close()
+
 
 if __name__ == "__main__":
     main()
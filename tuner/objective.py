@@ -12,32 +12,98 @@
  */
 """
 
+import os
+import json
+import logging
 import time
+import hashlib
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+# cache file path -> {configuration hash: objective value}, each file read once per process
+_OBJECTIVE_CACHES = {}
+
+
+def _config_key(config_dict, workload):
+    # denormalized values are already at MySQL granularity (integers, boolean tokens);
+    # the workload keeps results of other servers or benchmarks apart
+    return hashlib.md5(json.dumps([workload, sorted(config_dict.items())]).encode()).hexdigest()
+
+
+def _load_objective_cache(cache_path):
+    cache = _OBJECTIVE_CACHES.get(cache_path)
+    if cache is None:
+        try:
+            with open(cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        _OBJECTIVE_CACHES[cache_path] = cache
+    return cache
+
+
+def _save_objective_cache(cache_path, cache):
+    # write-then-rename, an interrupted run never leaves a truncated cache behind
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, cache_path)
+
+
+def untuned_knob_defaults(full_knob_dict, normalizer):
+    """
+    (knob, default value) for every knob of full_knob_dict the normalizer does not tune,
+    in full_knob_dict order. Computed once per BO round rather than on every objective call.
+    """
+    return tuple(
+        (knob, values[1][2])
+        for knob, values in full_knob_dict.items()
+        if knob not in normalizer.knob_name_set
+    )
+
+
 def objective_func(norm_values, driver, normalizer, full_knob_dict,
-                   frozen_values, benchmark="sysbench", intermediate_csv=None):
-    print('func obj called')
+                   frozen_values, benchmark="sysbench", intermediate_csv=None,
+                   untuned_defaults=None, cache_path=None):
+    """
+    Objective value of one normalized configuration (negated TPS for OLTP benchmarks).
+    With cache_path, results of configurations already benchmarked on the same workload,
+    in this run or an earlier one, are read from that JSON file instead of being measured
+    again. Only complete measurements are stored, not estimates or failed runs.
+    """
+    logger.debug("func obj called")
+    if untuned_defaults is None:
+        untuned_defaults = untuned_knob_defaults(full_knob_dict, normalizer)
     config_dict = normalizer.denormalize(norm_values)
-    for knob, values in full_knob_dict.items():
-        if knob not in normalizer.knob_names:
-            if knob in frozen_values:
-                config_dict[knob] = frozen_values[knob]
-            else:
-                config_dict[knob] = values[1][2]
+    # knobs outside the search space: frozen value if any, else the default
+    for knob, default in untuned_defaults:
+        config_dict[knob] = frozen_values.get(knob, default)
 
     if getattr(driver, 'debug', False):
         tps = np.random.uniform(1000, 2000)
+        return -tps
+
+    if cache_path:
+        cache = _load_objective_cache(cache_path)
+        key = _config_key(config_dict, driver.workload_key(benchmark))
+        if key in cache:
+            logger.info("configuration already benchmarked, reusing its result")
+            return cache[key]
+
+    success = driver.apply_config_and_restart(config_dict)
+    if not success:
+        time.sleep(5)
+        return 1e9
+    time.sleep(2)
+    if 'tpch' in benchmark:
+        value = driver.execute_olap(sql_file_path="../benchmark/queries.sql", intermediate_csv= intermediate_csv)
     else:
-        success = driver.apply_config_and_restart(config_dict)
-        if not success:
-            time.sleep(5)
-            return 1e9
-        time.sleep(2)
-        if 'tpch' in benchmark:
-            tps = driver.execute_olap(sql_file_path="../benchmark/queries.sql", intermediate_csv= intermediate_csv)
-            return tps
-        else:
-            tps, _, _, _ = driver.execute_oltp(benchmark=benchmark)
-
-    return -tps
+        tps, _, _, _ = driver.execute_oltp(benchmark=benchmark)
+        value = -tps
+
+    # sampled OLAP / aborted OLTP estimates and failed runs are not cached
+    if cache_path and driver.last_result_final:
+        cache[key] = float(value)
+        _save_objective_cache(cache_path, cache)
+    return value
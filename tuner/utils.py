@@ -13,19 +13,15 @@
 """
 
 import os
-import sys
 import csv
-import json
+import logging
 import random
 import numpy as np
+from itertools import zip_longest
 from typing import List
+from config import load_config  # re-exported, main imports it from here
 
-def load_config(config_path):
-    if not os.path.isfile(config_path):
-        print(f"ERROR: Config file not found: {config_path}")
-        sys.exit(1)
-    with open(config_path, "r") as f:
-        return json.load(f)
+logger = logging.getLogger(__name__)
 
 def get_knob_dicts(config_data, top_n, is_random=0):
     full_knob_dict = config_data["knob_dict"]
@@ -45,70 +41,166 @@ def get_knob_dicts(config_data, top_n, is_random=0):
     return full_knob_dict, tuned_knob_dict, tuned_keys
 
 
-def load_y_data(csv_path: str):
-    print("Loading y data from", csv_path)
-    y0 = []
-    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
-        return y0
-    with open(csv_path, "r") as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        knob_indices = {name: header.index(name) for name in header[3:]}
-        for row in reader:
-            try:
-                tps = float(row[2])
-            except Exception:
+# Column of the TPS value in the intermediate CSV: iteration, timestamp, TPS, knobs...
+TPS_COL = 2
+
+
+def _float_or_nan(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _normalize_columns(columns: dict, n_rows: int, tuned_knob_list: list, normalizer) -> list:
+    """
+    Normalize per-knob columns of raw CSV values into x0 rows (lists) for tuned_knob_list.
+    Knobs without a column read as 0.0; rows that cannot be normalized become all zeros.
+    """
+    for knob in tuned_knob_list:
+        if knob not in columns:
+            print("Warining: knob not found in loading")
+    # columns resolved once, in the order normalize_batch expects (normalizer.knob_names)
+    ordered = tuple(columns.get(k) for k in normalizer.knob_names)
+    raw = np.empty((n_rows, len(ordered)), dtype=object)
+    for i, col in enumerate(ordered):
+        raw[:, i] = 0.0 if col is None else col
+    norm = normalizer.normalize_batch(raw)
+
+    failed = np.isnan(norm).any(axis=1)
+    for i in np.flatnonzero(failed):
+        print(f"Warning: Normalization failed for row {i + 1} with values {raw[i].tolist()}")
+    norm[failed] = 0.0
+    return norm.tolist()
+
+
+class TrialStore:
+    """
+    In-memory copy of the intermediate CSV for one tuning run. The file only grows, so each
+    refresh reads and parses just the bytes appended since the previous one, instead of
+    re-reading the whole file for every feature-selection cycle.
+    """
+    def __init__(self, csv_path: str):
+        self.csv_path = csv_path
+        self._offset = 0
+        self._knob_names = None
+        self._tps = []
+        # knob -> raw values of the kept rows: float when numeric, str otherwise (e.g. "ON")
+        self._columns = {}
+        # running max of self._tps[:self._prefix_len], see perf_maxes
+        self._prefix_len = 0
+        self._prefix_max = -np.inf
+
+    def _reset(self):
+        self._offset = 0
+        self._knob_names = None
+        self._tps = []
+        self._columns = {}
+        self._prefix_len = 0
+        self._prefix_max = -np.inf
+
+    def refresh(self):
+        """
+        Parse the complete rows appended to the CSV since the last call.
+        """
+        if not os.path.exists(self.csv_path):
+            self._reset()
+            return
+        size = os.path.getsize(self.csv_path)
+        if size < self._offset:
+            # the file was replaced or truncated, start over
+            self._reset()
+        if size == self._offset:
+            return
+        with open(self.csv_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        # leave a partially written last line for the next refresh
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return
+        self._offset += end
+        lines = data[:end].decode().splitlines()
+
+        rows = csv.reader(lines)
+        if self._knob_names is None:
+            self._knob_names = next(rows)[TPS_COL + 1:]
+            self._columns = {k: [] for k in self._knob_names}
+        columns = [self._columns[k] for k in self._knob_names]
+        for row in rows:
+            tps = _float_or_nan(row[TPS_COL]) if len(row) > TPS_COL else np.nan
+            if np.isnan(tps):
                 continue
-            y0.append(tps)
-    print("loaded y0", y0)
-    return y0
+            self._tps.append(tps)
+            for col, value in zip_longest(columns, row[TPS_COL + 1:len(self._knob_names) + TPS_COL + 1],
+                                          fillvalue=np.nan):
+                col.append(_float_or_str(value))
 
+    def perf_maxes(self, n_calls: int):
+        """
+        (best TPS of the last n_calls trials, best TPS of the trials before them, 0.0 if none).
+        The earlier maximum is kept between calls and only extended over the trials that
+        left the window since, so the TPS history is not rescanned every round.
+        """
+        logger.debug("Loading y data from %s", self.csv_path)
+        self.refresh()
+        split = max(len(self._tps) - n_calls, 0)
+        if split < self._prefix_len:
+            # window grew (larger n_calls): recompute from the start
+            self._prefix_len, self._prefix_max = 0, -np.inf
+        if split > self._prefix_len:
+            self._prefix_max = max(self._prefix_max, max(self._tps[self._prefix_len:split]))
+            self._prefix_len = split
+        cur_perf = max(self._tps[split:])
+        best_perf = self._prefix_max if split else 0.0
+        logger.debug("recent best TPS %s, previous best TPS %s", cur_perf, best_perf)
+        return cur_perf, best_perf
 
-def load_intermediate_data(csv_path: str, tuned_knob_list: list, normalizer):
-    x0, y0 = [], []
-    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+    def x_for(self, tuned_knob_list: list, normalizer):
+        """
+        (x0, y0) for the given knobs: normalized knob values of every trial and their
+        negated TPS, as gp_minimize expects them.
+        """
+        self.refresh()
+        if not self._tps:
+            return [], []
+        x0 = _normalize_columns(self._columns, len(self._tps), tuned_knob_list, normalizer)
+        y0 = [-tps for tps in self._tps]
+        logger.debug("loaded X0 %s", x0)
         return x0, y0
-    with open(csv_path, "r") as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        knob_indices = {name: header.index(name) for name in header[3:]}
-        for row in reader:
-            try:
-                tps = float(row[2])
-            except Exception:
-                continue
-            config = {}
-            for knob in tuned_knob_list:
-                if knob in knob_indices:
-                    try:
-                        config[knob] = float(row[knob_indices[knob]])
-                    except Exception:
-                        config[knob] = str(row[knob_indices[knob]])  # boolean fallback
-                else:
-                    config[knob] = 0.0
-                    print("Warining: knob not found in loading")
-            try:
-                norm_values = normalizer.normalize(config)
-            except Exception as e:
-                print(f"Warning: Normalization failed for row {row} with error: {e}")
-                norm_values = [0.0] * len(tuned_knob_list)
-            x0.append(norm_values)
-            y0.append(-tps)
-        print("loaded X0", x0)
-    return x0, y0
+
+
+def _float_or_str(value):
+    # same conversion as the CSV loader: numbers as float, anything else (e.g. "ON") as is
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
 
 def build_search_space(tuned_knob_list):
     from skopt.space import Real
     return [Real(0.0, 1.0, name=k) for k in tuned_knob_list]
 
-def get_combined_config(normalizer, full_knob_dict, frozen_values, best_norm):
-    tuned_config = normalizer.denormalize(best_norm)
-    combined = {}
-    for knob, values in full_knob_dict.items():
-        if knob in tuned_config:
-            combined[knob] = tuned_config[knob]
-        elif knob in frozen_values:
-            combined[knob] = frozen_values[knob]
-        else:
-            combined[knob] = values[1][2]
-    return combined
+def knob_layout(full_knob_dict):
+    """
+    (knob names, knob -> column map, default values) of full_knob_dict in its order,
+    computed once and passed to get_combined_config.
+    """
+    names = tuple(full_knob_dict)
+    return names, {k: i for i, k in enumerate(names)}, [full_knob_dict[k][1][2] for k in names]
+
+def get_combined_config(normalizer, full_knob_dict, frozen_values, best_norm, layout=None):
+    """
+    Full configuration for best_norm: tuned knobs denormalized, then frozen values, then defaults.
+    """
+    names, columns, defaults = layout if layout is not None else knob_layout(full_knob_dict)
+    row = defaults.copy()
+    # only the frozen knobs are visited, not the whole knob dict
+    for knob, value in frozen_values.items():
+        col = columns.get(knob)
+        if col is not None:
+            row[col] = value
+    # tuned values take precedence over frozen ones
+    normalizer.denormalize_into(best_norm, row, columns)
+    return dict(zip(names, row))